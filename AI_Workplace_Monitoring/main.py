@@ -1,82 +1,292 @@
 # main.py
 import time
+import queue
+import threading
+import traceback
 import cv2
+import numpy as np
 
 from modules.video_input import VideoStream
 from modules.detection import PeopleDetector
-from modules.tracking import PeopleTracker
-from modules.behaviour import analyse_behaviour
+from modules.tracking import PeopleTracker, DeepSortTrackerAdapter
+from modules.behaviour import analyse_behaviour, BehaviourState
 from modules.restricted_area import RestrictedAreaChecker
 from modules.alert_logger import AlertLogger
 
+TARGET_FPS = 15  # Max inference rate for live sources; extra frames are dropped
+VIDEO_SOURCES = [0]  # Webcam; add more sources to batch them through one detector
+CAPTURE_SIZE = (640, 480)  # Native capture resolution closest to the detector input
+TRACKER = "iou"  # "iou" (PeopleTracker) or "deepsort" (DeepSORT with ReID features)
+DEEPSORT_EMBED_EVERY = 3  # DeepSORT: run the ReID embedder every K frames
+ALERT_CSV_FILE = "alerts.csv"  # Processed alerts are appended here; None disables the log
+
+def create_tracker():
+    if TRACKER == "deepsort":
+        return DeepSortTrackerAdapter(max_age=30, embed_every=DEEPSORT_EMBED_EVERY)
+    if TRACKER == "iou":
+        return PeopleTracker(iou_threshold=0.3, max_missing=30)
+    raise ValueError(f"Unknown TRACKER: {TRACKER}")
+
+def window_name(cam):
+    if len(VIDEO_SOURCES) == 1:
+        return "Workplace Monitor"
+    return f"Workplace Monitor - Camera {cam}"
+
+class TrackDrawer:
+    """Draws all track boxes in one call and reuses pre-rendered ID labels"""
+
+    FONT = cv2.FONT_HERSHEY_SIMPLEX
+    COLOR = (0, 255, 0)
+    MAX_CACHED_LABELS = 256
+
+    def __init__(self):
+        self._label_cache = {}
+
+    def _label(self, cid):
+        """Returns (sprite, inverse alpha, ascent) for an ID label, rendering it once"""
+        cached = self._label_cache.get(cid)
+
+        if cached is None:
+            text = f"ID: {cid}"
+            (w, h), baseline = cv2.getTextSize(text, self.FONT, 0.5, 2)
+
+            sprite = np.zeros((h + baseline + 2, w + 2, 3), dtype=np.uint8)
+            cv2.putText(sprite, text, (1, h + 1), self.FONT, 0.5, self.COLOR, 2)
+
+            # putText anti-aliases: the sprite is COLOR * coverage on black,
+            # so coverage (alpha) is recovered from its intensity
+            alpha = sprite.max(axis=2, keepdims=True).astype(np.float32) / max(self.COLOR)
+
+            cached = (sprite, 1.0 - alpha, h + 1)
+            self._label_cache[cid] = cached
+
+        return cached
+
+    def draw(self, frame, tracked_objects):
+        if not tracked_objects:
+            return frame
+
+        # All rectangles as closed 4-point polylines in a single call
+        boxes = np.array([obj["bbox"] for obj in tracked_objects], dtype=np.int32)
+        rects = boxes[:, [0, 1, 2, 1, 2, 3, 0, 3]].reshape(-1, 4, 2)
+        cv2.polylines(frame, rects, True, self.COLOR, 2)
+
+        frame_h, frame_w = frame.shape[:2]
+
+        for obj, (x1, y1) in zip(tracked_objects, boxes[:, :2].tolist()):
+            sprite, inv_alpha, ascent = self._label(obj["id"])
+
+            # Same placement as putText at (x1, y1 - 10) (sprite has a 1 px margin),
+            # clipped to the frame
+            top, left = y1 - 10 - ascent, x1 - 1
+            fy0, fx0 = max(top, 0), max(left, 0)
+            fy1 = min(top + sprite.shape[0], frame_h)
+            fx1 = min(left + sprite.shape[1], frame_w)
+
+            if fy1 <= fy0 or fx1 <= fx0:
+                continue
+
+            sy0, sx0 = fy0 - top, fx0 - left
+            sub_inv_alpha = inv_alpha[sy0:sy0 + fy1 - fy0, sx0:sx0 + fx1 - fx0]
+            sub_sprite = sprite[sy0:sy0 + fy1 - fy0, sx0:sx0 + fx1 - fx0]
+
+            # Same blend putText does on the frame (+0.5 rounds on the uint8 cast)
+            roi = frame[fy0:fy1, fx0:fx1]
+            roi[...] = roi * sub_inv_alpha + sub_sprite + 0.5
+
+        # IDs only grow; drop labels of tracks no longer on screen
+        if len(self._label_cache) > self.MAX_CACHED_LABELS:
+            active = {obj["id"] for obj in tracked_objects}
+            self._label_cache = {
+                cid: label for cid, label in self._label_cache.items() if cid in active
+            }
+
+        return frame
+
+def _put(q, item, stop_event):
+    """Blocking put that gives up once the pipeline is stopping"""
+    while not stop_event.is_set():
+        try:
+            q.put(item, timeout=0.1)
+            return
+        except queue.Full:
+            continue
+
+def capture_detect_stage(videos, detector, out_queue, stop_event):
+    """Stage 1: read the newest frame of every stream and run batched detection"""
+    try:
+        min_interval = 1.0 / TARGET_FPS
+        last_infer = 0.0
+
+        # Video files are analysed frame by frame; only live streams are throttled
+        throttle = all(video.live for video in videos)
+
+        while not stop_event.is_set():
+            frames = []
+            for video in videos:
+                ret, frame = video.get_frame()
+                if not ret:
+                    break
+                frames.append(frame)
+
+            if len(frames) < len(videos):
+                break
+
+            # Drop frames arriving faster than the detector should run
+            if throttle:
+                now = time.monotonic()
+                if now - last_infer < min_interval:
+                    continue
+                last_infer = now
+
+            # 1️⃣ Detection (one batched call for all streams)
+            batch_detections = detector.detect_people_batch(frames)
+
+            _put(out_queue, (frames, batch_detections), stop_event)
+    except Exception:
+        print("Error in capture/detection stage:")
+        traceback.print_exc()
+        stop_event.set()
+    finally:
+        # Always tell the next stage (and the GUI loop) to finish
+        _put(out_queue, None, stop_event)
+
+def analysis_stage(in_queue, out_queue, trackers, behaviour_states,
+                   restricted_checkers, alert_logger, stop_event):
+    """Stage 2: tracking, behaviour and restricted-area checks per stream"""
+    try:
+        while not stop_event.is_set():
+            try:
+                item = in_queue.get(timeout=0.1)
+            except queue.Empty:
+                continue
+
+            if item is None:
+                break
+
+            frames, batch_detections = item
+            results = []
+
+            for cam, (frame, detections) in enumerate(zip(frames, batch_detections)):
+
+                # 2️⃣ Tracking (DeepSORT also needs the frame for its embedder)
+                if TRACKER == "deepsort":
+                    tracked_objects = trackers[cam].update(detections, frame=frame)
+                else:
+                    tracked_objects = trackers[cam].update(detections)
+
+                # 3️⃣ Behaviour Analysis
+                alerts = analyse_behaviour(tracked_objects, behaviour_states[cam])
+
+                # 4️⃣ Restricted Areas
+                centers, ids = trackers[cam].get_centers_ids()
+                alerts += restricted_checkers[cam].check_restricted_area(
+                    tracked_objects, centers=centers, ids=ids
+                )
+
+                for alert in alerts:
+                    alert["camera"] = cam
+                    alert_logger.log_alert(alert)
+
+                results.append((frame, tracked_objects))
+
+            _put(out_queue, results, stop_event)
+    except Exception:
+        print("Error in analysis stage:")
+        traceback.print_exc()
+        stop_event.set()
+    finally:
+        # Always tell the next stage (and the GUI loop) to finish
+        _put(out_queue, None, stop_event)
+
 def main():
     # -----------------------------
     # Initialize modules
     # -----------------------------
-    video = VideoStream(0)  # Webcam
+    videos = [
+        VideoStream(source, width=CAPTURE_SIZE[0], height=CAPTURE_SIZE[1])
+        for source in VIDEO_SOURCES
+    ]
     detector = PeopleDetector(
     model_path="yolov8n.pt",
     conf_threshold=0.5,
-    resize_width=None
+    resize_width=None,
+    export_format=None,        # "auto": TensorRT engine on CUDA, OpenVINO on CPU
+                               # (needs tensorrt / openvino installed)
+    imgsz=640,                 # Lower to 320 if latency matters more than accuracy
+    int8=False,                # INT8 export; set calib_data to workplace frames
+    batch=len(VIDEO_SOURCES),
+    device="cpu"               # "auto": CUDA (FP16, GPU letterbox) when available
 )
-    tracker = PeopleTracker(iou_threshold=0.3, max_missing=30)
-    alert_logger = AlertLogger()
+    # Per-stream state (track IDs are only unique within a stream)
+    trackers = [create_tracker() for _ in videos]
+    behaviour_states = [BehaviourState() for _ in videos]
+    restricted_checkers = []
+
+    alert_logger = AlertLogger(alert_csv_file=ALERT_CSV_FILE)
     alert_logger.start()
-    cv2.namedWindow("Workplace Monitor", cv2.WINDOW_NORMAL)
-    cv2.resizeWindow("Workplace Monitor", 1000, 700)
-    # Read first frame to initialize restricted area checker
-    ret, frame = video.get_frame()
-    if not ret:
-        print("Error: Cannot read from video source")
-        return
 
-    restricted_checker = RestrictedAreaChecker(frame.shape)
+    for cam, video in enumerate(videos):
+        cv2.namedWindow(window_name(cam), cv2.WINDOW_NORMAL)
+        cv2.resizeWindow(window_name(cam), 1000, 700)
+
+        # Read first frame to initialize restricted area checker
+        ret, frame = video.get_frame()
+        if not ret:
+            print(f"Error: Cannot read from video source {VIDEO_SOURCES[cam]}")
+            return
+
+        restricted_checkers.append(RestrictedAreaChecker(frame.shape))
 
     # -----------------------------
-    # Main loop
+    # Pipeline: capture+detect | track+analyse | draw (main thread)
     # -----------------------------
+    stop_event = threading.Event()
+    detect_queue = queue.Queue(maxsize=2)
+    draw_queue = queue.Queue(maxsize=2)
+
+    stages = [
+        threading.Thread(
+            target=capture_detect_stage,
+            args=(videos, detector, detect_queue, stop_event),
+            daemon=True
+        ),
+        threading.Thread(
+            target=analysis_stage,
+            args=(detect_queue, draw_queue, trackers, behaviour_states,
+                  restricted_checkers, alert_logger, stop_event),
+            daemon=True
+        ),
+    ]
+    for stage in stages:
+        stage.start()
+
+    track_drawer = TrackDrawer()
+
+    # GUI calls must stay on the main thread
     while True:
-        ret, frame = video.get_frame()
-        if not ret:
+        try:
+            results = draw_queue.get(timeout=0.1)
+        except queue.Empty:
+            # A failed stage sets stop_event; its end marker may not fit the queue
+            if stop_event.is_set():
+                break
+            if cv2.waitKey(1) & 0xFF == ord('q'):
+                break
+            continue
+
+        if results is None:
             break
 
-        # 1️⃣ Detection
-        detections = detector.detect_people(frame)
+        for cam, (frame, tracked_objects) in enumerate(results):
 
-        # 2️⃣ Tracking
-        tracked_objects = tracker.update(detections)
+            # 5️⃣ Visualization (optional)
+            # Draw in place: each frame is a fresh buffer owned by this loop
+            frame_vis = track_drawer.draw(frame, tracked_objects)
+
+            frame_vis = restricted_checkers[cam].draw_areas(frame_vis)
+            cv2.imshow(window_name(cam), frame_vis)
 
-        # 3️⃣ Behaviour Analysis
-        behaviour_input = [
-            {
-                "id": obj["id"],
-                "center": obj["center"],
-                "timestamp": obj["timestamp"]
-            }
-            for obj in tracked_objects
-        ]
-        alerts = analyse_behaviour(behaviour_input)
-        for alert in alerts:
-            alert_logger.log_alert(alert)
-
-        restricted_alerts = restricted_checker.check_restricted_area(tracked_objects)
-
-        for alert in restricted_alerts:
-            alert_logger.log_alert(alert)
-
-        # 5️⃣ Visualization (optional)
-        frame_vis = frame.copy()
-        for obj in tracked_objects:
-            x1, y1, x2, y2 = obj["bbox"]
-            cid = obj["id"]
-            cv2.rectangle(frame_vis, (x1, y1), (x2, y2), (0, 255, 0), 2)
-            cv2.putText(frame_vis, f"ID: {cid}", (x1, y1 - 10),
-                        cv2.FONT_HERSHEY_SIMPLEX, 0.5, (0, 255, 0), 2)
-
-        frame_vis = restricted_checker.draw_areas(frame_vis)
-        cv2.imshow("Workplace Monitor", frame_vis)
-
-        time.sleep(0.01)
         # Press 'q' to quit
         if cv2.waitKey(1) & 0xFF == ord('q'):
             break
@@ -84,7 +294,12 @@ def main():
     # -----------------------------
     # Cleanup
     # -----------------------------
-    video.release()
+    stop_event.set()
+    for stage in stages:
+        stage.join(timeout=5)
+
+    for video in videos:
+        video.release()
     cv2.destroyAllWindows()
     alert_logger.stop()
     print("System stopped gracefully.")
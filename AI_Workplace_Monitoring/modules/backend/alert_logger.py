@@ -1,10 +1,10 @@
+import os
+import csv
 import time
 import threading
-import queue
-import hashlib
-import json
 import logging
-from datetime import datetime
+import functools
+from collections import deque
 from typing import Dict, Tuple
 
 # Configure logging
@@ -34,7 +34,13 @@ class AlertPriority:
 
     @classmethod
     def get_priority(cls, alert_type: str) -> str:
-        return cls.PRIORITY_MAP.get(alert_type, cls.MEDIUM)
+        return get_priority(alert_type)
+
+
+@functools.lru_cache(maxsize=32)
+def get_priority(alert_type: str) -> str:
+    """Cached priority lookup (alert types are a small closed set)"""
+    return AlertPriority.PRIORITY_MAP.get(alert_type, AlertPriority.MEDIUM)
 
 
 # Priority limits (Used for deduplication control)
@@ -52,6 +58,8 @@ class AlertDeduplicator:
         self.time_window = time_window
         self.alert_cache = {}
         self.cooldown_cache = {}
+        # (expiry_time, hash) pairs in insertion order
+        self._expiry = deque()
         self.lock = threading.Lock()
 
         # Cooldown periods (seconds)
@@ -59,13 +67,10 @@ class AlertDeduplicator:
             "CROWD_DETECTED": 30   # Crowd alert only once every 30 sec
         }
 
-    def _generate_hash(self, alert: Dict) -> str:
-        hash_data = {
-            "type": alert.get("type", ""),
-            "person_id": alert.get("person_id", ""),
-        }
-        hash_string = json.dumps(hash_data, sort_keys=True)
-        return hashlib.md5(hash_string.encode()).hexdigest()
+    def _generate_hash(self, alert: Dict) -> Tuple:
+        # Only used as a cache key, so a plain tuple is enough.
+        # Camera is included since track IDs are only unique per stream.
+        return (alert.get("camera", ""), alert.get("type", ""), alert.get("person_id", ""))
 
     def should_process_alert(self, alert: Dict) -> Tuple[bool, int]:
         with self.lock:
@@ -77,21 +82,28 @@ class AlertDeduplicator:
             if alert_type in self.cooldowns:
                 cooldown_time = self.cooldowns[alert_type]
 
-                last_trigger = self.cooldown_cache.get(alert_type, 0)
+                # Per camera: a crowd on one stream must not mute the others
+                cooldown_key = (alert.get("camera", ""), alert_type)
+                last_trigger = self.cooldown_cache.get(cooldown_key, 0)
 
                 if current_time - last_trigger < cooldown_time:
                     return False, 0
 
-                self.cooldown_cache[alert_type] = current_time
+                self.cooldown_cache[cooldown_key] = current_time
                 return True, 1
 
             # ---------- NORMAL DEDUP LOGIC ----------
-            expired = [
-                k for k, (t, _) in self.alert_cache.items()
-                if current_time - t > self.time_window * 2
-            ]
-            for k in expired:
-                del self.alert_cache[k]
+            expiry_window = self.time_window * 2
+
+            while self._expiry and self._expiry[0][0] < current_time:
+                _, h = self._expiry.popleft()
+
+                # Entry may have been refreshed after this expiry was queued
+                cached = self.alert_cache.get(h)
+                if cached and current_time - cached[0] > expiry_window:
+                    del self.alert_cache[h]
+
+            self._expiry.append((current_time + expiry_window, alert_hash))
 
             if alert_hash in self.alert_cache:
                 last_time, count = self.alert_cache[alert_hash]
@@ -100,7 +112,7 @@ class AlertDeduplicator:
                     new_count = count + 1
                     self.alert_cache[alert_hash] = (current_time, new_count)
 
-                    priority = AlertPriority.get_priority(alert_type)
+                    priority = get_priority(alert_type)
                     max_count = PRIORITY_LIMITS.get(priority, 3)
 
                     return new_count <= max_count, new_count
@@ -115,15 +127,51 @@ class AlertDeduplicator:
 
 
 
+CSV_HEADER = ["timestamp", "camera", "type", "priority", "person_id", "occurrence", "details"]
+CSV_FLUSH_EVERY = 32   # Flush buffered CSV rows every N alerts
+ALERT_QUEUE_SIZE = 100
+
+
 class AlertLogger:
     """Lightweight alert logging system"""
 
-    def __init__(self):
+    # Priority → stats counter key
+    _PRIORITY_STAT = {
+        AlertPriority.HIGH: "high_priority",
+        AlertPriority.MEDIUM: "medium_priority",
+        AlertPriority.LOW: "low_priority"
+    }
+
+    def __init__(self, alert_csv_file=None):
+        """
+        alert_csv_file → Optional path; processed alerts are appended to it
+        """
         self.deduplicator = AlertDeduplicator()
-        self.alert_queue = queue.Queue(maxsize=100)
+
+        # deque append/popleft are thread-safe; the event only wakes the worker
+        self.alert_queue = deque()
+        self._wake = threading.Event()
         self.running = False
         self.worker_thread = None
 
+        # CSV file stays open for the logger's lifetime (buffered appends).
+        # Only the worker thread writes to it, so no lock is needed.
+        self.alert_csv_file = alert_csv_file
+        self._csv_fh = None
+        self._csv_writer = None
+        self._csv_pending = 0
+
+        if alert_csv_file:
+            write_header = (
+                not os.path.exists(alert_csv_file)
+                or os.path.getsize(alert_csv_file) == 0
+            )
+            self._csv_fh = open(alert_csv_file, "a", newline="", buffering=8192)
+            self._csv_writer = csv.writer(self._csv_fh)
+
+            if write_header:
+                self._csv_writer.writerow(CSV_HEADER)
+
         self.stats = {
             "total_alerts": 0,
             "high_priority": 0,
@@ -145,36 +193,54 @@ class AlertLogger:
 
     def stop(self):
         self.running = False
-
-        try:
-            self.alert_queue.put(None, timeout=1)
-        except:
-            pass
+        self._wake.set()
 
         if self.worker_thread:
             self.worker_thread.join(timeout=5)
 
+        # The worker closes the file on its way out; only close it here if
+        # no worker is left that could still be writing
+        if self.worker_thread is None or not self.worker_thread.is_alive():
+            self._close_csv()
+        else:
+            logger.warning("Alert worker still draining, CSV closes when it exits")
+
         logger.info("Alert logger stopped")
 
+    def _close_csv(self):
+        if self._csv_fh:
+            self._csv_fh.close()
+            self._csv_fh = None
+            self._csv_writer = None
+
     def log_alert(self, alert: Dict):
-        try:
-            if 'timestamp' not in alert:
-                alert['timestamp'] = time.time()
+        if len(self.alert_queue) >= ALERT_QUEUE_SIZE:
+            logger.warning("Alert queue full, dropping alert")
+            return
 
-            self.alert_queue.put(alert, timeout=1)
+        if 'timestamp' not in alert:
+            alert['timestamp'] = time.time()
 
-        except queue.Full:
-            logger.warning("Alert queue full, dropping alert")
+        self.alert_queue.append(alert)
+        self._wake.set()
 
     def _process_alerts(self):
-        while self.running or not self.alert_queue.empty():
+        try:
+            self._drain_alerts()
+        finally:
+            self._close_csv()
 
-            try:
-                alert = self.alert_queue.get(timeout=1)
+    def _drain_alerts(self):
+        while self.running or self.alert_queue:
 
-                if alert is None:
-                    break
+            try:
+                alert = self.alert_queue.popleft()
+            except IndexError:
+                self._wake.wait(1)
+                self._wake.clear()
+                continue
 
+            try:
                 self.stats["total_alerts"] += 1
 
                 # Deduplication
@@ -185,31 +251,46 @@ class AlertLogger:
                     continue
 
                 # Priority detection
-                priority = AlertPriority.get_priority(alert.get('type', ''))
+                priority = get_priority(alert.get('type', ''))
 
-                if priority == AlertPriority.HIGH:
-                    self.stats["high_priority"] += 1
-                elif priority == AlertPriority.MEDIUM:
-                    self.stats["medium_priority"] += 1
-                else:
-                    self.stats["low_priority"] += 1
+                self.stats[self._PRIORITY_STAT.get(priority, "low_priority")] += 1
 
                 # Print real-time alert
-                timestamp = datetime.fromtimestamp(alert['timestamp']).strftime('%H:%M:%S')
+                timestamp = time.strftime('%H:%M:%S', time.localtime(alert['timestamp']))
 
                 print(
                     f"[{timestamp}] {priority} ALERT: {alert.get('type')} "
-                    f"(Person {alert.get('person_id', 'N/A')}) - Occurrence #{occurrence_count}"
+                    f"(Camera {alert.get('camera', 'N/A')}, Person {alert.get('person_id', 'N/A')})"
+                    f" - Occurrence #{occurrence_count}"
                 )
 
-                logger.info(f"{priority} ALERT: {json.dumps(alert)}")
+                # Lazy formatting: skipped entirely when INFO is disabled
+                logger.info("%s ALERT: %s", priority, alert)
 
-            except queue.Empty:
-                continue
+                if self._csv_writer:
+                    self._save_alert_to_csv(alert, priority, occurrence_count)
 
             except Exception as e:
                 logger.error(f"Error processing alert: {e}")
 
+    def _save_alert_to_csv(self, alert: Dict, priority: str, occurrence_count: int):
+        timestamp = time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(alert['timestamp']))
+
+        self._csv_writer.writerow([
+            timestamp,
+            alert.get('camera', ''),
+            alert.get('type', ''),
+            priority,
+            alert.get('person_id', ''),
+            occurrence_count,
+            alert.get('details', '')
+        ])
+
+        self._csv_pending += 1
+        if self._csv_pending >= CSV_FLUSH_EVERY:
+            self._csv_fh.flush()
+            self._csv_pending = 0
+
     def get_statistics(self) -> Dict:
         return self.stats.copy()
 
@@ -1,5 +1,9 @@
-import time
-import math
+import numpy as np
+
+try:
+    from numba import njit
+except ImportError:
+    njit = None
 
 # -----------------------------
 # Thresholds (Updated As Requested)
@@ -12,124 +16,258 @@ CROWD_DISTANCE_THRESHOLD = 50
 CROWD_COUNT_THRESHOLD = 3
 ALERT_COOLDOWN = 10            # Prevent alert spam
 
-person_history = {}
+# Alert codes returned by the kernel
+ALERT_IDLE = 0
+ALERT_SUSPICIOUS = 1
+ALERT_TYPES = ("IDLE", "SUSPICIOUS_STANDING")
 
 
-def distance(p1, p2):
-    return math.sqrt((p1[0] - p2[0])**2 + (p1[1] - p2[1])**2)
+class BehaviourState:
+    """
+    Per-stream person history as parallel arrays (Structure-of-Arrays).
+    Each tracked ID owns a slot; slots are recycled when the ID disappears.
+    """
 
+    def __init__(self, capacity=64):
+        self.last_pos = np.zeros((capacity, 2), dtype=np.float32)
+        self.last_move = np.zeros(capacity, dtype=np.float64)
+        self.first_seen = np.zeros(capacity, dtype=np.float64)
+        self.last_idle_alert = np.zeros(capacity, dtype=np.float64)
+        self.last_suspicious_alert = np.zeros(capacity, dtype=np.float64)
 
-def analyse_behaviour(tracked_people):
+        self.id_to_slot = {}
+        self.free_slots = list(range(capacity - 1, -1, -1))
 
-    alerts = []
-    centers = []
+    def _grow(self):
+        capacity = len(self.last_move)
 
-    active_ids = {p["id"] for p in tracked_people}
+        self.last_pos = np.concatenate([self.last_pos, np.zeros_like(self.last_pos)])
+        self.last_move = np.concatenate([self.last_move, np.zeros_like(self.last_move)])
+        self.first_seen = np.concatenate([self.first_seen, np.zeros_like(self.first_seen)])
+        self.last_idle_alert = np.concatenate(
+            [self.last_idle_alert, np.zeros_like(self.last_idle_alert)]
+        )
+        self.last_suspicious_alert = np.concatenate(
+            [self.last_suspicious_alert, np.zeros_like(self.last_suspicious_alert)]
+        )
+
+        self.free_slots.extend(range(2 * capacity - 1, capacity - 1, -1))
+
+    def release_missing(self, active_ids):
+        """Free the slots of people no longer tracked"""
+        for pid in list(self.id_to_slot.keys()):
+            if pid not in active_ids:
+                self.free_slots.append(self.id_to_slot.pop(pid))
+
+    def acquire(self, pid, center, timestamp):
+        """Assign and initialize a slot for a new person"""
+        if not self.free_slots:
+            self._grow()
+
+        slot = self.free_slots.pop()
+        self.id_to_slot[pid] = slot
+
+        self.last_pos[slot] = center
+        self.last_move[slot] = timestamp
+        self.first_seen[slot] = timestamp
+        self.last_idle_alert[slot] = 0
+        self.last_suspicious_alert[slot] = 0
+
+        return slot
+
+    def __len__(self):
+        return len(self.id_to_slot)
 
-    # -----------------------------
-    # Remove disappeared people
-    # -----------------------------
-    for pid in list(person_history.keys()):
-        if pid not in active_ids:
-            del person_history[pid]
 
-    current_time = time.time()
+person_history = BehaviourState()
+
+
+def _behaviour_kernel_numpy(centers, last_pos, last_move, first_seen, ts, is_new,
+                            last_idle_alert, last_suspicious_alert):
+    """
+    Vectorized equivalent of _behaviour_kernel_loops (used without numba)
+    Returns: moved mask, alert (index, code, duration) arrays, crowd mask
+    """
+    seen = ~is_new
 
     # -----------------------------
-    # Process each tracked person
+    # Movement Detection
     # -----------------------------
-    for person in tracked_people:
+    delta = centers - last_pos
+    moved = seen & (np.einsum("ij,ij->i", delta, delta) > MOVEMENT_THRESHOLD ** 2)
 
-        pid = person["id"]
-        center = person["center"]
-        timestamp = person["timestamp"]
+    idle_time = ts - np.where(moved, ts, last_move)
+    total_time = ts - first_seen
 
-        centers.append((pid, center))
+    # Observation Window
+    observed = seen & (total_time >= OBSERVATION_TIME)
 
-        # -----------------------------
-        # Initialize New Person
-        # -----------------------------
-        if pid not in person_history:
-            person_history[pid] = {
-                "last_position": center,
-                "last_move_time": timestamp,
-                "first_seen": timestamp,
-                "last_alert_time": {}
-            }
-            continue
+    idle = (observed & (idle_time >= IDLE_TIME_THRESHOLD)
+            & (ts - last_idle_alert > ALERT_COOLDOWN))
+    suspicious = (observed & (total_time >= SUSPICIOUS_TIME_THRESHOLD)
+                  & (ts - last_suspicious_alert > ALERT_COOLDOWN))
 
-        history = person_history[pid]
+    # Row-major nonzero keeps the kernel's order: per person, idle first
+    alert_idx, alert_code = np.nonzero(np.stack([idle, suspicious], axis=1))
+    alert_dur = np.where(alert_code == ALERT_IDLE, idle_time[alert_idx], total_time[alert_idx])
 
-        prev_pos = history["last_position"]
-        move_dist = distance(center, prev_pos)
+    # -----------------------------
+    # Crowd Detection
+    # -----------------------------
+    # Squared pairwise distances, upper triangle only (each pair once)
+    diff = centers[:, None, :] - centers[None, :, :]
+    d2 = np.einsum("ijk,ijk->ij", diff, diff)
+    close = np.triu(d2 < CROWD_DISTANCE_THRESHOLD ** 2, k=1)
+    in_crowd = close.any(axis=0) | close.any(axis=1)
+
+    return moved, alert_idx, alert_code, alert_dur, in_crowd
+
+
+def _behaviour_kernel_loops(centers, last_pos, last_move, first_seen, ts, is_new,
+                            last_idle_alert, last_suspicious_alert):
+    """
+    Movement, idle/suspicious and crowd checks for one frame.
+    Cooldowns are measured against each person's frame timestamp.
+    Returns: moved mask, alert (index, code, duration) arrays, crowd mask
+    """
+    n = centers.shape[0]
+
+    moved = np.zeros(n, dtype=np.bool_)
+    alert_idx = np.empty(2 * n, dtype=np.int64)
+    alert_code = np.empty(2 * n, dtype=np.int64)
+    alert_dur = np.empty(2 * n, dtype=np.float64)
+    k = 0
+
+    move_thresh2 = MOVEMENT_THRESHOLD * MOVEMENT_THRESHOLD
+
+    for i in range(n):
+        if is_new[i]:
+            continue
 
         # -----------------------------
         # Movement Detection
         # -----------------------------
-        if move_dist > MOVEMENT_THRESHOLD:
-            history["last_move_time"] = timestamp
-            history["last_position"] = center
+        dx = centers[i, 0] - last_pos[i, 0]
+        dy = centers[i, 1] - last_pos[i, 1]
 
-        idle_time = timestamp - history["last_move_time"]
-        total_time = timestamp - history["first_seen"]
+        move_time = last_move[i]
+        if dx * dx + dy * dy > move_thresh2:
+            moved[i] = True
+            move_time = ts[i]
 
-        # -----------------------------
-        # 1️⃣ Observation Window
-        # -----------------------------
+        idle_time = ts[i] - move_time
+        total_time = ts[i] - first_seen[i]
+
+        # Observation Window
         if total_time < OBSERVATION_TIME:
             continue
 
-        # -----------------------------
-        # 2️⃣ Idle Detection (2 Minutes)
-        # -----------------------------
-        if idle_time >= IDLE_TIME_THRESHOLD:
+        # Idle Detection
+        if (idle_time >= IDLE_TIME_THRESHOLD
+                and ts[i] - last_idle_alert[i] > ALERT_COOLDOWN):
+            alert_idx[k] = i
+            alert_code[k] = ALERT_IDLE
+            alert_dur[k] = idle_time
+            k += 1
+
+        # Suspicious Standing
+        if (total_time >= SUSPICIOUS_TIME_THRESHOLD
+                and ts[i] - last_suspicious_alert[i] > ALERT_COOLDOWN):
+            alert_idx[k] = i
+            alert_code[k] = ALERT_SUSPICIOUS
+            alert_dur[k] = total_time
+            k += 1
 
-            last_alert = history["last_alert_time"].get("IDLE", 0)
+    # -----------------------------
+    # Crowd Detection (each pair once)
+    # -----------------------------
+    in_crowd = np.zeros(n, dtype=np.bool_)
+    crowd_thresh2 = CROWD_DISTANCE_THRESHOLD * CROWD_DISTANCE_THRESHOLD
 
-            if current_time - last_alert > ALERT_COOLDOWN:
-                alerts.append({
-                    "type": "IDLE",
-                    "person_id": pid,
-                    "duration": round(idle_time, 2)
-                })
+    for i in range(n):
+        for j in range(i + 1, n):
+            dx = centers[i, 0] - centers[j, 0]
+            dy = centers[i, 1] - centers[j, 1]
 
-                history["last_alert_time"]["IDLE"] = current_time
+            if dx * dx + dy * dy < crowd_thresh2:
+                in_crowd[i] = True
+                in_crowd[j] = True
 
-        # -----------------------------
-        # 3️⃣ Suspicious Standing (3 Minutes)
-        # -----------------------------
-        if total_time >= SUSPICIOUS_TIME_THRESHOLD:
+    return moved, alert_idx[:k], alert_code[:k], alert_dur[:k], in_crowd
+
+
+if njit is not None:
+    _behaviour_kernel = njit(cache=True)(_behaviour_kernel_loops)
+else:
+    # Interpreted loops are slower than NumPy broadcasting
+    _behaviour_kernel = _behaviour_kernel_numpy
+
+
+def analyse_behaviour(tracked_people, state=None):
+    """
+    state → Per-stream BehaviourState; defaults to the module-level person_history
+    """
+    if state is None:
+        state = person_history
+
+    alerts = []
+    n = len(tracked_people)
 
-            last_alert = history["last_alert_time"].get("SUSPICIOUS_STANDING", 0)
+    # -----------------------------
+    # Remove disappeared people
+    # -----------------------------
+    state.release_missing({p["id"] for p in tracked_people})
+
+    # -----------------------------
+    # Gather current frame and per-person slots
+    # -----------------------------
+    centers = np.array([p["center"] for p in tracked_people], dtype=np.float32).reshape(n, 2)
+    ts = np.array([p["timestamp"] for p in tracked_people], dtype=np.float64)
+    slots = np.empty(n, dtype=np.intp)
+    is_new = np.zeros(n, dtype=np.bool_)
 
-            if current_time - last_alert > ALERT_COOLDOWN:
-                alerts.append({
-                    "type": "SUSPICIOUS_STANDING",
-                    "person_id": pid,
-                    "duration": round(total_time, 2)
-                })
+    for i, person in enumerate(tracked_people):
+        slot = state.id_to_slot.get(person["id"])
 
-                history["last_alert_time"]["SUSPICIOUS_STANDING"] = current_time
+        # Initialize New Person
+        if slot is None:
+            slot = state.acquire(person["id"], centers[i], ts[i])
+            is_new[i] = True
+
+        slots[i] = slot
+
+    moved, alert_idx, alert_code, alert_dur, in_crowd = _behaviour_kernel(
+        centers, state.last_pos[slots], state.last_move[slots],
+        state.first_seen[slots], ts, is_new,
+        state.last_idle_alert[slots], state.last_suspicious_alert[slots]
+    )
 
     # -----------------------------
-    # Crowd Detection (Counts Actual People)
+    # Write results back (vectorized scatter)
     # -----------------------------
-    crowd_people = set()
+    moved_slots = slots[moved]
+    state.last_pos[moved_slots] = centers[moved]
+    state.last_move[moved_slots] = ts[moved]
 
-    for i in range(len(centers)):
-        pid1, c1 = centers[i]
+    idle = alert_idx[alert_code == ALERT_IDLE]
+    state.last_idle_alert[slots[idle]] = ts[idle]
 
-        for j in range(i + 1, len(centers)):
-            pid2, c2 = centers[j]
+    suspicious = alert_idx[alert_code == ALERT_SUSPICIOUS]
+    state.last_suspicious_alert[slots[suspicious]] = ts[suspicious]
+
+    for i, code, duration in zip(alert_idx, alert_code, alert_dur):
+        alerts.append({
+            "type": ALERT_TYPES[code],
+            "person_id": tracked_people[i]["id"],
+            "duration": round(float(duration), 2)
+        })
 
-            if distance(c1, c2) < CROWD_DISTANCE_THRESHOLD:
-                crowd_people.add(pid1)
-                crowd_people.add(pid2)
+    crowd_count = int(np.count_nonzero(in_crowd))
 
-    if len(crowd_people) >= CROWD_COUNT_THRESHOLD:
+    if crowd_count >= CROWD_COUNT_THRESHOLD:
         alerts.append({
             "type": "CROWD_DETECTED",
-            "count": len(crowd_people)
+            "count": crowd_count
         })
 
     return alerts
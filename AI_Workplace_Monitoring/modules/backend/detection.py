@@ -1,75 +1,339 @@
+import os
 from ultralytics import YOLO
 import torch
+import torch.nn.functional as F
 import cv2
+import numpy as np
 
 
 class PeopleDetector:
 
     PERSON_CLASS_ID = 0
+    MAX_DETECTIONS = 50
+    PAD_VALUE = 114 / 255.0  # Ultralytics letterbox grey
 
-    def __init__(self, model_path="yolov8n.pt", conf_threshold=0.5, resize_width=None):
+    # Ultralytics export format → artifact suffix next to the .pt file
+    EXPORT_SUFFIXES = {
+        "onnx": ".onnx",
+        "openvino": "_openvino_model",
+        "engine": ".engine",
+    }
+
+    def __init__(self, model_path="yolov8n.pt", conf_threshold=0.5, resize_width=None,
+                 export_format=None, imgsz=640, int8=False, calib_data="coco8.yaml",
+                 batch=1, device="cpu"):
+        """
+        export_format → Optional backend ("onnx", "openvino", "engine", or "auto"
+                        for TensorRT on CUDA / OpenVINO on CPU).
+                        The model is exported once and the artifact reused.
+        imgsz → Inference size (exported models are fixed to it)
+        int8 → Quantize the exported model to INT8
+        calib_data → Dataset yaml used for INT8 calibration
+                     (ideally a small set of workplace frames)
+        batch → Frames per inference call (exported models are fixed to it)
+        device → "cpu" (default), "cuda[:N]", or "auto" for CUDA when available
+                 (CUDA runs FP16)
+        """
 
         # Select device
-        self.device = "cpu"
+        if device == "auto":
+            device = "cuda" if torch.cuda.is_available() else "cpu"
+        self.device = device
+
+        # "cuda:0" etc. → "cuda"
+        self._device_type = torch.device(device).type
+
+        # FP16 on CUDA: half the memory traffic, uses tensor cores
+        self._half = self._device_type == "cuda"
 
-        self.model = YOLO(model_path)
-        self.model.to(self.device)
+        self.imgsz = imgsz
+        self.int8 = int8
+        self.calib_data = calib_data
+        self.batch = batch
+        self.model = self._load_model(model_path, export_format)
 
         self.conf_threshold = conf_threshold
         self.resize_width = resize_width
 
-    def preprocess(self, frame):
+        # Preallocated model input (B,3,S,S) and per-size resize buffers (CPU path)
+        self._input = None
+        if self._device_type != "cuda":
+            self._alloc_input(batch)
+        self._resize_bufs = {}
+
+        # CUDA path: device-side input and pinned raw-frame staging per slot
+        self._input_gpu = None
+        self._gpu_slot_shape = []
+        self._pinned_frames = {}
+
+        # preprocess() output buffers, one per batch slot
+        self._preprocess_bufs = {}
+
+    def _alloc_input(self, n):
+        """Allocate the (n,3,S,S) host-side model input (CPU path)"""
+        size = self.imgsz
+        tensor = torch.full((n, 3, size, size), self.PAD_VALUE, dtype=torch.float32)
+
+        self._input_tensor = tensor
+        self._input = tensor.numpy()  # Shares memory with the tensor
+        self._slot_shape = [None] * n
+
+    def _load_model(self, model_path, export_format):
+        """
+        Load the PyTorch model, or its exported artifact (exporting if missing).
+        Ultralytics picks the backend from the artifact's extension.
+        Falls back to the PyTorch model if export or loading fails.
+        """
+        if export_format == "auto":
+            export_format = "engine" if self._device_type == "cuda" else "openvino"
+
+        if export_format is not None:
+            try:
+                return self._load_exported(model_path, export_format)
+            except Exception as e:
+                print(
+                    f"Model export ({export_format}) failed, using {model_path} "
+                    "(see the optional export backends in requirements.txt):", e
+                )
+
+        model = YOLO(model_path)
+        model.to(self.device)
+
+        if self._half:
+            model.model.half()
+
+        return model
+
+    def _load_exported(self, model_path, export_format):
+        """Export model_path to export_format once, then load the artifact"""
+
+        # TensorRT engines get FP16 layers (mixed with INT8 when requested)
+        half = export_format == "engine" and self._half
+
+        # Artifact name is keyed by size, batch and precision so variants don't collide
+        precision = "int8" if self.int8 else "fp16" if half else "fp32"
+        exported_path = (
+            f"{os.path.splitext(model_path)[0]}_{self.imgsz}_b{self.batch}_{precision}"
+            f"{self.EXPORT_SUFFIXES[export_format]}"
+        )
+
+        if not os.path.exists(exported_path):
+            export_args = {
+                "format": export_format,
+                "imgsz": self.imgsz,
+                "batch": self.batch,
+                "device": self.device
+            }
+
+            if half:
+                export_args.update(half=True, dynamic=False, workspace=4)
+
+            if self.int8:
+                export_args.update(int8=True, data=self.calib_data)
+
+            os.replace(YOLO(model_path).export(**export_args), exported_path)
+
+        return YOLO(exported_path, task="detect")
+
+    def preprocess(self, frame, slot=0):
         """
         Optional resizing for performance
+        slot → Batch position; each slot reuses its own output buffer
         """
         if self.resize_width is None:
             return frame
 
         height, width = frame.shape[:2]
+
+        # Source already delivers the requested width
+        if width == self.resize_width:
+            return frame
+
         ratio = self.resize_width / width
         new_height = int(height * ratio)
 
-        return cv2.resize(frame, (self.resize_width, new_height))
+        key = (slot, new_height)
+        resized = self._preprocess_bufs.get(key)
+        if resized is None:
+            resized = np.empty((new_height, self.resize_width, 3), dtype=np.uint8)
+            self._preprocess_bufs[key] = resized
+
+        cv2.resize(frame, (self.resize_width, new_height), dst=resized,
+                   interpolation=cv2.INTER_LINEAR)
+
+        return resized
+
+    def _letterbox_geometry(self, height, width):
+        """Returns: scale, resized (w, h), padding (x, y) for the model input"""
+        size = self.imgsz
+        scale = min(size / height, size / width)
+        new_w, new_h = int(round(width * scale)), int(round(height * scale))
+        return scale, new_w, new_h, (size - new_w) // 2, (size - new_h) // 2
+
+    def _prepare_input(self, frames):
+        """
+        Letterbox frames into the preallocated input buffer.
+        Returns: input tensor, per-frame (scale, pad_x, pad_y)
+        """
+        if self._device_type == "cuda":
+            return self._prepare_input_cuda(frames)
+
+        n = len(frames)
+
+        if self._input.shape[0] < n:
+            self._alloc_input(n)
+
+        transforms = []
+
+        for i, frame in enumerate(frames):
+            height, width = frame.shape[:2]
+            scale, new_w, new_h, pad_x, pad_y = self._letterbox_geometry(height, width)
+
+            # Re-pad the slot only when the frame geometry changes
+            if self._slot_shape[i] != (new_h, new_w):
+                self._input[i].fill(self.PAD_VALUE)
+                self._slot_shape[i] = (new_h, new_w)
+
+            if (new_h, new_w) == (height, width):
+                # Already at input size: no resize pass needed
+                resized = frame
+            else:
+                resized = self._resize_bufs.get((new_h, new_w))
+                if resized is None:
+                    resized = np.empty((new_h, new_w, 3), dtype=np.uint8)
+                    self._resize_bufs[(new_h, new_w)] = resized
+
+                cv2.resize(frame, (new_w, new_h), dst=resized, interpolation=cv2.INTER_LINEAR)
+
+            # BGR→RGB, HWC→CHW, uint8→float32 and /255 in a single pass
+            np.multiply(
+                resized.transpose(2, 0, 1)[::-1],
+                np.float32(1 / 255.0),
+                out=self._input[i, :, pad_y:pad_y + new_h, pad_x:pad_x + new_w],
+                dtype=np.float32
+            )
+
+            transforms.append((scale, pad_x, pad_y))
+
+        return self._input_tensor[:n], transforms
+
+    def _prepare_input_cuda(self, frames):
+        """
+        CUDA letterbox: upload each raw uint8 frame once (from pinned memory)
+        and do colour swap, normalization and resize on the GPU.
+        Returns: device input tensor, per-frame (scale, pad_x, pad_y)
+        """
+        n = len(frames)
+        size = self.imgsz
+        dtype = torch.float16 if self._half else torch.float32
+
+        if self._input_gpu is None or self._input_gpu.shape[0] < n:
+            self._input_gpu = torch.full(
+                (max(n, self.batch), 3, size, size), self.PAD_VALUE,
+                dtype=dtype, device=self.device
+            )
+            self._gpu_slot_shape = [None] * self._input_gpu.shape[0]
+
+        transforms = []
+
+        for i, frame in enumerate(frames):
+            height, width = frame.shape[:2]
+            scale, new_w, new_h, pad_x, pad_y = self._letterbox_geometry(height, width)
+
+            staging = self._pinned_frames.get((i, height, width))
+            if staging is None:
+                staging = torch.empty((height, width, 3), dtype=torch.uint8).pin_memory()
+                self._pinned_frames[(i, height, width)] = staging
+
+            staging.numpy()[...] = frame
+
+            # HWC BGR uint8 → 1x3xHxW RGB in [0, 1]
+            t = staging.to(self.device, non_blocking=True)
+            t = t.permute(2, 0, 1).flip(0).unsqueeze(0).to(dtype) / 255.0
+
+            if (new_h, new_w) != (height, width):
+                t = F.interpolate(t, size=(new_h, new_w), mode="bilinear", align_corners=False)
+
+            # Re-pad the slot only when the frame geometry changes
+            if self._gpu_slot_shape[i] != (new_h, new_w):
+                self._input_gpu[i].fill_(self.PAD_VALUE)
+                self._gpu_slot_shape[i] = (new_h, new_w)
+
+            self._input_gpu[i, :, pad_y:pad_y + new_h, pad_x:pad_x + new_w] = t[0]
+
+            transforms.append((scale, pad_x, pad_y))
+
+        return self._input_gpu[:n], transforms
 
     def detect_people(self, frame):
+        return self.detect_people_batch([frame])[0]
 
-        # Safety check
-        if frame is None or frame.size == 0:
-            return []
+    def detect_people_batch(self, frames):
+        """
+        Run one batched inference over several frames (e.g. one per camera).
+        Frames are stacked into a single (N,3,S,S) tensor on the inference
+        device. Returns a detections list per input frame, in order.
+        """
+        batch_detections = [[] for _ in frames]
 
-        frame = self.preprocess(frame)
+        # Safety check: skip empty frames but keep output aligned
+        valid_idx = []
+        valid_frames = []
 
-        if frame is None or frame.size == 0:
-            return []
+        for i, frame in enumerate(frames):
+            if frame is None or frame.size == 0:
+                continue
+
+            frame = self.preprocess(frame, slot=len(valid_frames))
+
+            if frame is None or frame.size == 0:
+                continue
+
+            valid_idx.append(i)
+            valid_frames.append(frame)
+
+        if not valid_frames:
+            return batch_detections
 
         try:
-            results = self.model(frame, verbose=False)
+            # CPU input stays on the host; CUDA input is built on the device
+            input_tensor, transforms = self._prepare_input(valid_frames)
+
+            with torch.inference_mode():
+                # Person-only, thresholded and capped inside NMS
+                results = self.model(
+                    input_tensor, verbose=False, half=self._half, device=self.device,
+                    classes=[self.PERSON_CLASS_ID], conf=self.conf_threshold,
+                    max_det=self.MAX_DETECTIONS
+                )
         except Exception as e:
             print("YOLO Inference Error:", e)
-            return []
+            return batch_detections
 
-        detections = []
-
-        for result in results:
-            if result.boxes is None:
-                continue
+        for i, frame, result, transform in zip(valid_idx, valid_frames, results, transforms):
+            batch_detections[i] = self._postprocess(result, transform, frame.shape)
 
-            for box in result.boxes:
+        return batch_detections
 
-                class_id = int(box.cls[0])
-                confidence = float(box.conf[0])
-
-                if (
-                    class_id == self.PERSON_CLASS_ID
-                    and confidence > self.conf_threshold
-                ):
+    def _postprocess(self, result, transform, frame_shape):
+        """
+        Map person boxes from letterboxed input back to the frame
+        """
+        scale, pad_x, pad_y = transform
+        height, width = frame_shape[:2]
 
-                    x1, y1, x2, y2 = map(int, box.xyxy[0])
+        if result.boxes is None:
+            return []
 
-                    detections.append({
-                        "bbox": [x1, y1, x2, y2],
-                        "confidence": confidence
-                    })
+        # One device→host copy: (N,6) rows of x1, y1, x2, y2, conf, cls.
+        # Class and confidence were already filtered by NMS.
+        kept = result.boxes.data.cpu().numpy()
 
-        return detections
+        xyxy = (kept[:, :4] - (pad_x, pad_y, pad_x, pad_y)) / scale
+        np.clip(xyxy[:, 0::2], 0, width, out=xyxy[:, 0::2])
+        np.clip(xyxy[:, 1::2], 0, height, out=xyxy[:, 1::2])
 
+        return [
+            {"bbox": bbox, "confidence": confidence}
+            for bbox, confidence in zip(xyxy.astype(np.int32).tolist(), kept[:, 4].tolist())
+        ]
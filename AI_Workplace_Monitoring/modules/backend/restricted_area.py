@@ -1,70 +1,181 @@
 import cv2
 import numpy as np
 
+try:
+    from numba import njit
+except ImportError:
+    # Pure-Python fallback: same kernel, interpreted
+    def njit(*args, **kwargs):
+        if args and callable(args[0]):
+            return args[0]
+        return lambda func: func
+
+
+@njit(cache=True)
+def _winding_contains(points, poly):
+    """
+    Integer winding-number test, boundary counts as inside
+    points → (N,2) int32 query points
+    poly   → (M,2) int32 polygon vertices
+    Returns: (N,) bool mask
+    """
+    n = points.shape[0]
+    m = poly.shape[0]
+    inside = np.zeros(n, dtype=np.bool_)
+
+    for i in range(n):
+        x = np.int64(points[i, 0])
+        y = np.int64(points[i, 1])
+        wn = 0
+
+        for j in range(m):
+            x0 = np.int64(poly[j, 0])
+            y0 = np.int64(poly[j, 1])
+            x1 = np.int64(poly[(j + 1) % m, 0])
+            y1 = np.int64(poly[(j + 1) % m, 1])
+
+            # > 0: point left of the edge, < 0: right, 0: on the line
+            cross = (x1 - x0) * (y - y0) - (x - x0) * (y1 - y0)
+
+            if (cross == 0 and min(x0, x1) <= x <= max(x0, x1)
+                    and min(y0, y1) <= y <= max(y0, y1)):
+                wn = 1
+                break
+
+            if y0 <= y:
+                if y1 > y and cross > 0:
+                    wn += 1
+            elif y1 <= y and cross < 0:
+                wn -= 1
+
+        inside[i] = wn != 0
+
+    return inside
+
+
+def _classify_shape(points):
+    """'rect' for 4 vertices with alternating axis-aligned edges, else 'poly'"""
+    if len(points) != 4:
+        return 'poly'
+
+    edges = np.roll(points, -1, axis=0) - points
+    vertical = edges[:, 0] == 0
+    horizontal = edges[:, 1] == 0
+
+    if not np.all(vertical ^ horizontal):
+        return 'poly'
+
+    # Edges must alternate, otherwise the 4 points do not form a rectangle
+    return 'rect' if vertical[0] != vertical[1] and vertical[0] == vertical[2] else 'poly'
+
 
 class RestrictedAreaChecker:
     """Manages restricted areas"""
 
+    AREA_COLOR = (0, 0, 255)
+    AREA_ALPHA = 0.2
+
     def __init__(self, frame_shape):
         self.frame_height, self.frame_width = frame_shape[:2]
         self.restricted_areas = []
         self.alerts_logged = set()
+
+        # Static drawing layers, rebuilt when areas or frame size change
+        self._overlay_shape = None
+        self._area_blends = []
+        self._lines = None
+
         self._create_default_areas()
 
-    def _create_default_areas(self):
+    def _add_area(self, name, points, max_people):
+        """
+        Register an area and cache everything derived from its polygon:
+        int32 points, bounding box, label centroid and containment test
+        """
+        points = np.ascontiguousarray(points, dtype=np.int32)
+        shape = _classify_shape(points)
 
-        # -----------------------------
-        # Server Room (LEFT - Full Height)
-        # -----------------------------
-        server_points = np.array([
-            [0, 0],
-            [self.frame_width * 0.33, 0],
-            [self.frame_width * 0.33, self.frame_height],
-            [0, self.frame_height]
-        ], dtype=np.int32)
+        if shape == 'rect':
+            # The bounding-box prefilter is already exact
+            inside = None
+        else:
+            def inside(query, poly=points):
+                return _winding_contains(query, poly)
 
         self.restricted_areas.append({
-            'name': 'Server Room',
-            'points': server_points,
-            'max_people': 0
+            'name': name,
+            'points': points,
+            'max_people': max_people,
+            'shape': shape,
+            # Axis-aligned bounding box, used to skip polygon tests
+            'bbox': (
+                points[:, 0].min(), points[:, 1].min(),
+                points[:, 0].max(), points[:, 1].max()
+            ),
+            'centroid': tuple(points.mean(axis=0).astype(np.int32).tolist()),
+            # (N,2) int32 → (N,) bool, None for rectangles
+            '_inside': inside
         })
 
-        # -----------------------------
-        # Equipment Zone (RIGHT - Full Height)
-        # -----------------------------
-        equipment_points = np.array([
-            [self.frame_width * 0.67, 0],
-            [self.frame_width, 0],
-            [self.frame_width, self.frame_height],
-            [self.frame_width * 0.67, self.frame_height]
-        ], dtype=np.int32)
+        self._overlay_shape = None
 
-        self.restricted_areas.append({
-            'name': 'Equipment Zone',
-            'points': equipment_points,
-            'max_people': 1
-        })
+    def _create_default_areas(self):
+        w, h = self.frame_width, self.frame_height
+
+        # Server Room (LEFT - Full Height)
+        self._add_area('Server Room', [
+            [0, 0],
+            [w * 0.33, 0],
+            [w * 0.33, h],
+            [0, h]
+        ], max_people=0)
+
+        # Equipment Zone (RIGHT - Full Height)
+        self._add_area('Equipment Zone', [
+            [w * 0.67, 0],
+            [w, 0],
+            [w, h],
+            [w * 0.67, h]
+        ], max_people=1)
 
     def point_in_polygon(self, point, polygon_points):
-        x, y = point
-        return cv2.pointPolygonTest(polygon_points, (float(x), float(y)), False) >= 0
+        query = np.array([point], dtype=np.int32)
+        poly = np.ascontiguousarray(polygon_points, dtype=np.int32).reshape(-1, 2)
+        return bool(_winding_contains(query, poly)[0])
 
-    def check_restricted_area(self, tracked_people):
+    def check_restricted_area(self, tracked_people, centers=None, ids=None):
+        """
+        centers, ids → Optional (N,2) / (N,) arrays matching tracked_people
+                       (e.g. PeopleTracker.get_centers_ids()), skipping the
+                       per-person conversion
+        """
         alerts = []
 
+        if len(tracked_people) == 0:
+            return alerts
+
+        if centers is None or ids is None:
+            # Centers are integer pixels already; keep them int for the box test
+            centroids = np.array([p['center'] for p in tracked_people], dtype=np.int32)
+            ids = [p['id'] for p in tracked_people]
+        else:
+            centroids = np.asarray(centers, dtype=np.int32)
+            ids = ids.tolist() if isinstance(ids, np.ndarray) else list(ids)
+
+        cx, cy = centroids[:, 0], centroids[:, 1]
+
         for area in self.restricted_areas:
             area_name = area['name']
-            area_points = area['points']
             max_allowed = area['max_people']
 
-            people_in_area = []
+            # Cheap bounding-box filter first, polygon test only on hits
+            x0, y0, x1, y1 = area['bbox']
+            candidates = np.flatnonzero((cx >= x0) & (cx <= x1) & (cy >= y0) & (cy <= y1))
 
-            for person in tracked_people:
-                person_id = person['id']
-                centroid = person['center']
+            if candidates.size and area['_inside'] is not None:
+                candidates = candidates[area['_inside'](centroids[candidates])]
 
-                if self.point_in_polygon(centroid, area_points):
-                    people_in_area.append(person_id)
+            people_in_area = [ids[i] for i in candidates]
 
             if len(people_in_area) > max_allowed:
                 alerts.append({
@@ -75,28 +186,87 @@ class RestrictedAreaChecker:
 
         return alerts
 
-    def draw_areas(self, frame):
+    def _build_overlay(self, frame_shape):
+        """
+        Pre-render everything draw_areas needs: a tint + mask per area
+        (cropped to its bounding box) and the border/label pixels with their
+        blend weights
+        """
+        height, width = frame_shape[:2]
+        self._area_blends = []
+
+        covered = np.zeros((height, width), dtype=np.uint8)
+
+        for area in self.restricted_areas:
+            mask = np.zeros((height, width), dtype=np.uint8)
+            cv2.fillPoly(mask, [area['points']], 255)
+
+            # Tint each pixel once even where areas overlap
+            mask[covered > 0] = 0
+            covered |= mask
+
+            ys, xs = np.nonzero(mask)
+            if ys.size == 0:
+                continue
+
+            rows = slice(ys.min(), ys.max() + 1)
+            cols = slice(xs.min(), xs.max() + 1)
+            roi_mask = mask[rows, cols] > 0
+
+            tint = np.empty(roi_mask.shape + (3,), dtype=np.uint8)
+            tint[:] = self.AREA_COLOR
+
+            self._area_blends.append((rows, cols, roi_mask[..., None], tint, roi_mask.all()))
 
-        overlay = frame.copy()
+        # Borders and labels, rendered once on black: pixel = AREA_COLOR * coverage
+        lines = np.zeros((height, width, 3), dtype=np.uint8)
 
         for area in self.restricted_areas:
-            points = area['points']
-            name = area['name']
+            cv2.polylines(lines, [area['points']], True, self.AREA_COLOR, 2)
+            cv2.putText(lines, area['name'], area['centroid'],
+                        cv2.FONT_HERSHEY_SIMPLEX, 0.7, self.AREA_COLOR, 2)
+
+        coverage = lines.max(axis=2).astype(np.float32) / max(self.AREA_COLOR)
+
+        # Lines sit under the 20% tint: inside an area the tint pass blends them,
+        # outside it they keep (1 - alpha) of their weight
+        weight = np.where(covered > 0, 1.0, 1 - self.AREA_ALPHA).astype(np.float32)
+
+        idx = np.flatnonzero(coverage)
+        if idx.size:
+            w = (coverage * weight).ravel()[idx, None]
+            colour = lines.reshape(-1, 3)[idx] * weight.ravel()[idx, None]
+            self._lines = (idx, 1.0 - w, colour)
+        else:
+            self._lines = None
+
+        self._overlay_shape = (height, width)
+
+    def draw_areas(self, frame):
+        """Blend the cached area overlay into frame (in place)"""
 
-            # Transparent fill
-            cv2.fillPoly(overlay, [points], (0, 0, 255))
+        if self._overlay_shape != frame.shape[:2]:
+            self._build_overlay(frame.shape)
 
-            # Border
-            cv2.polylines(frame, [points], True, (0, 0, 255), 2)
+        # Flat pixel view for the sparse line blend
+        frame = np.ascontiguousarray(frame)
 
-            centroid = points.mean(axis=0).astype(int)
+        # Border + labels, blended by coverage (before the tint, as putText
+        # and polylines drew under the overlay blend)
+        if self._lines is not None:
+            idx, inv_weight, colour = self._lines
+            pixels = frame.reshape(-1, 3)
+            pixels[idx] = pixels[idx] * inv_weight + colour + 0.5
 
-            cv2.putText(frame, name, tuple(centroid),
-                        cv2.FONT_HERSHEY_SIMPLEX, 0.7, (0, 0, 255), 2)
+        # Transparent fill, limited to each area's bounding box
+        for rows, cols, mask, tint, full in self._area_blends:
+            roi = frame[rows, cols]
+            blended = cv2.addWeighted(roi, 1 - self.AREA_ALPHA, tint, self.AREA_ALPHA, 0)
 
-        # Blend overlay
-        alpha = 0.2
-        frame = cv2.addWeighted(overlay, alpha, frame, 1 - alpha, 0)
+            if full:
+                roi[...] = blended
+            else:
+                np.copyto(roi, blended, where=mask)
 
         return frame
 
@@ -1,47 +1,165 @@
 import time
 import numpy as np
+from scipy.optimize import linear_sum_assignment
+
+try:
+    from numba import njit
+except ImportError:
+    njit = None
+
+
+class IouWorkspace:
+    """
+    NumPy IOU matrix using preallocated buffers: every step writes into
+    them with out=, so a call makes no (nT,nD) temporaries and the
+    max(0, ·) clamps are branchless ufuncs.
+    """
+
+    def __init__(self, max_tracks=64, max_dets=64):
+        self._alloc(max_tracks, max_dets)
+
+    def _alloc(self, max_tracks, max_dets):
+        self._xA, self._yA, self._dx, self._dy, self._inter = np.empty(
+            (5, max_tracks, max_dets), dtype=np.float32
+        )
+
+    def __call__(self, track_boxes, det_boxes):
+        """
+        Pairwise IOU between (nT,4) and (nD,4) xyxy boxes → (nT,nD) matrix
+        (a view into the workspace, valid until the next call)
+        """
+        T = track_boxes
+        D = det_boxes
+        n_tracks, n_dets = len(T), len(D)
+
+        if n_tracks > self._xA.shape[0] or n_dets > self._xA.shape[1]:
+            self._alloc(max(n_tracks, self._xA.shape[0]), max(n_dets, self._xA.shape[1]))
+
+        xA = self._xA[:n_tracks, :n_dets]
+        yA = self._yA[:n_tracks, :n_dets]
+        dx = self._dx[:n_tracks, :n_dets]
+        dy = self._dy[:n_tracks, :n_dets]
+        inter = self._inter[:n_tracks, :n_dets]
+
+        np.maximum(T[:, None, 0], D[None, :, 0], out=xA)
+        np.maximum(T[:, None, 1], D[None, :, 1], out=yA)
+        np.minimum(T[:, None, 2], D[None, :, 2], out=dx)
+        np.minimum(T[:, None, 3], D[None, :, 3], out=dy)
+
+        np.subtract(dx, xA, out=dx)
+        np.maximum(dx, 0, out=dx)
+        np.subtract(dy, yA, out=dy)
+        np.maximum(dy, 0, out=dy)
+        np.multiply(dx, dy, out=inter)
+
+        areaT = (T[:, 2] - T[:, 0]) * (T[:, 3] - T[:, 1])
+        areaD = (D[:, 2] - D[:, 0]) * (D[:, 3] - D[:, 1])
+
+        # union (+eps) into xA, then IOU into inter
+        np.add(areaT[:, None], areaD[None, :], out=xA)
+        np.subtract(xA, inter, out=xA)
+        np.add(xA, 1e-9, out=xA)
+        np.divide(inter, xA, out=inter)
+
+        return inter
+
+
+def _iou_matrix_numpy(track_boxes, det_boxes):
+    """
+    Pairwise IOU between (nT,4) and (nD,4) xyxy boxes → (nT,nD) matrix
+    """
+    return IouWorkspace(len(track_boxes), len(det_boxes))(track_boxes, det_boxes)
+
+
+if njit is not None:
+
+    @njit(cache=True, fastmath=True)
+    def _iou_matrix_jit(track_boxes, det_boxes):
+        n_tracks = track_boxes.shape[0]
+        n_dets = det_boxes.shape[0]
+        out = np.empty((n_tracks, n_dets), dtype=np.float32)
+
+        for i in range(n_tracks):
+            tx1 = track_boxes[i, 0]
+            ty1 = track_boxes[i, 1]
+            tx2 = track_boxes[i, 2]
+            ty2 = track_boxes[i, 3]
+            area_t = (tx2 - tx1) * (ty2 - ty1)
+
+            for j in range(n_dets):
+                dx1 = det_boxes[j, 0]
+                dy1 = det_boxes[j, 1]
+                dx2 = det_boxes[j, 2]
+                dy2 = det_boxes[j, 3]
+
+                w = min(tx2, dx2) - max(tx1, dx1)
+                h = min(ty2, dy2) - max(ty1, dy1)
+                inter = max(w, 0.0) * max(h, 0.0)
+
+                area_d = (dx2 - dx1) * (dy2 - dy1)
+                out[i, j] = inter / (area_t + area_d - inter + 1e-9)
+
+        return out
+
+    # Pay the JIT compile cost at import, not on the first frame
+    _iou_matrix_jit(np.zeros((1, 4), np.float32), np.zeros((1, 4), np.float32))
+
+    iou_matrix = _iou_matrix_jit
+
+else:
+    iou_matrix = _iou_matrix_numpy
 
 
 class PeopleTracker:
-    def __init__(self, iou_threshold=0.3, max_missing=30):
+    def __init__(self, iou_threshold=0.3, max_missing=30, capacity=64):
         """
         iou_threshold → Minimum IOU to match detections
         max_missing → Frames allowed before object is removed
+        capacity → Initial number of track slots (grows as needed)
         """
         self.next_id = 1
-        self.tracks = {}
         self.iou_threshold = iou_threshold
         self.max_missing = max_missing
 
-    # ---------------------------
-    # Utility: Calculate IOU
-    # ---------------------------
-    def _iou(self, boxA, boxB):
-        xA = max(boxA[0], boxB[0])
-        yA = max(boxA[1], boxB[1])
-        xB = min(boxA[2], boxB[2])
-        yB = min(boxA[3], boxB[3])
+        # Track state as parallel arrays (Structure-of-Arrays), one row per slot
+        self._ids = np.zeros(capacity, dtype=np.int64)
+        self._bbox = np.zeros((capacity, 4), dtype=np.int32)
+        self._conf = np.zeros(capacity, dtype=np.float64)
+        self._missing = np.zeros(capacity, dtype=np.int32)
+        self._timestamp = np.zeros(capacity, dtype=np.float64)
+        self._active = np.zeros(capacity, dtype=np.bool_)
+        self._free_slots = list(range(capacity - 1, -1, -1))
 
-        inter_area = max(0, xB - xA) * max(0, yB - yA)
+        # Without numba, reuse one IOU workspace instead of allocating per frame
+        self._iou_matrix = iou_matrix if njit is not None else IouWorkspace(capacity, capacity)
 
-        boxA_area = (boxA[2] - boxA[0]) * (boxA[3] - boxA[1])
-        boxB_area = (boxB[2] - boxB[0]) * (boxB[3] - boxB[1])
+        # Centers/ids of the last update() output, as arrays
+        self.last_centers = np.empty((0, 2), dtype=np.int32)
+        self.last_ids = np.empty(0, dtype=np.int64)
 
-        union = boxA_area + boxB_area - inter_area
+    def _grow(self):
+        capacity = len(self._ids)
 
-        if union == 0:
-            return 0
+        self._ids = np.concatenate([self._ids, np.zeros_like(self._ids)])
+        self._bbox = np.concatenate([self._bbox, np.zeros_like(self._bbox)])
+        self._conf = np.concatenate([self._conf, np.zeros_like(self._conf)])
+        self._missing = np.concatenate([self._missing, np.zeros_like(self._missing)])
+        self._timestamp = np.concatenate([self._timestamp, np.zeros_like(self._timestamp)])
+        self._active = np.concatenate([self._active, np.zeros_like(self._active)])
 
-        return inter_area / union
+        self._free_slots.extend(range(2 * capacity - 1, capacity - 1, -1))
 
-    # ---------------------------
-    # Utility: Calculate Center
-    # ---------------------------
-    def _center(self, bbox):
-        x1, y1, x2, y2 = bbox
-        cx = int((x1 + x2) / 2)
-        cy = int((y1 + y2) / 2)
-        return (cx, cy)
+    @property
+    def tracks(self):
+        """Active tracks keyed by ID (built on demand)"""
+        return {obj["id"]: obj for obj in self._output(include_missing=True)[0]}
+
+    def get_centers_ids(self):
+        """
+        Returns: (N,2) int32 centers and (N,) int64 ids of the last update,
+        in the same order as its tracked_objects output
+        """
+        return self.last_centers, self.last_ids
 
     # ---------------------------
     # Main Tracking Function
@@ -53,94 +171,275 @@ class PeopleTracker:
         """
 
         current_time = time.time()
-        updated_tracks = {}
 
-        # Keep track of matched track IDs
-        matched_ids = set()
+        # Convert detections into array form
+        det_bbox = np.asarray([det["bbox"] for det in detections], dtype=np.int32).reshape(-1, 4)
+        det_conf = np.asarray([det["confidence"] for det in detections], dtype=np.float64)
 
-        # Convert detections into easier format
-        det_boxes = [det["bbox"] for det in detections]
+        active = np.flatnonzero(self._active)
 
         # ---------------------------
-        # Match existing tracks
+        # Optimal track ↔ detection assignment on IOU
         # ---------------------------
-        for track_id, track_data in self.tracks.items():
+        rows = cols = np.empty(0, dtype=np.intp)
 
-            best_iou = 0
-            best_det_index = -1
+        if active.size and len(detections):
+            iou = self._iou_matrix(
+                self._bbox[active].astype(np.float32), det_bbox.astype(np.float32)
+            )
+            rows, cols = linear_sum_assignment(-iou)
 
-            for i, det in enumerate(det_boxes):
+            keep = iou[rows, cols] > self.iou_threshold
+            rows, cols = rows[keep], cols[keep]
 
-                if i in matched_ids:
-                    continue
+        # ---------------------------
+        # Update matched tracks in place
+        # ---------------------------
+        matched_slots = active[rows]
 
-                iou_score = self._iou(track_data["bbox"], det)
+        self._bbox[matched_slots] = det_bbox[cols]
+        self._conf[matched_slots] = det_conf[cols]
+        self._timestamp[matched_slots] = current_time
+        self._missing[matched_slots] = 0
 
-                if iou_score > best_iou:
-                    best_iou = iou_score
-                    best_det_index = i
+        matched = np.zeros(len(detections), dtype=np.bool_)
+        matched[cols] = True
 
-            # If matched detection found
-            if best_iou > self.iou_threshold and best_det_index != -1:
+        # ---------------------------
+        # Age unmatched tracks, drop expired ones
+        # ---------------------------
+        unmatched_slots = np.setdiff1d(active, matched_slots, assume_unique=True)
+        self._missing[unmatched_slots] += 1
 
-                det = detections[best_det_index]
-                bbox = det["bbox"]
+        expired = unmatched_slots[self._missing[unmatched_slots] > self.max_missing]
+        self._active[expired] = False
+        self._free_slots.extend(expired.tolist())
 
-                updated_tracks[track_id] = {
-                    "id": track_id,
-                    "bbox": bbox,
-                    "confidence": det["confidence"],
-                    "center": self._center(bbox),
-                    "timestamp": current_time,
-                    "missing": 0
-                }
+        # ---------------------------
+        # Add New Tracks (all unmatched detections at once)
+        # ---------------------------
+        new_dets = np.flatnonzero(~matched)
 
-                matched_ids.add(best_det_index)
+        if new_dets.size:
+            while len(self._free_slots) < new_dets.size:
+                self._grow()
 
-            else:
-                # Increase missing counter
-                track_data["missing"] += 1
+            new_slots = np.array(
+                [self._free_slots.pop() for _ in range(new_dets.size)], dtype=np.intp
+            )
 
-                if track_data["missing"] <= self.max_missing:
-                    updated_tracks[track_id] = track_data
+            self._ids[new_slots] = np.arange(self.next_id, self.next_id + new_dets.size)
+            self._bbox[new_slots] = det_bbox[new_dets]
+            self._conf[new_slots] = det_conf[new_dets]
+            self._timestamp[new_slots] = current_time
+            self._missing[new_slots] = 0
+            self._active[new_slots] = True
 
-        # ---------------------------
-        # Add New Tracks
-        # ---------------------------
-        for i, det in enumerate(detections):
+            self.next_id += int(new_dets.size)
+
+        tracked_objects, self.last_centers, self.last_ids = self._output()
 
-            if i in matched_ids:
-                continue
+        return tracked_objects
 
-            bbox = det["bbox"]
+    # ---------------------------
+    # Prepare Output Format
+    # ---------------------------
+    def _output(self, include_missing=False):
+        """
+        Convert active rows to the tracked_objects dict format
+        Returns: tracked_objects, centers (N,2) int32, ids (N,) int64
+        """
+        slots = np.flatnonzero(self._active)
+
+        ids = self._ids[slots]
+        bboxes = self._bbox[slots]
+
+        # All centers at once from the stacked bbox matrix
+        centers = (bboxes[:, :2] + bboxes[:, 2:]) // 2
+
+        tracked_objects = []
 
-            updated_tracks[self.next_id] = {
-                "id": self.next_id,
+        for track_id, bbox, center, confidence, timestamp, missing in zip(
+            ids.tolist(),
+            bboxes.tolist(),
+            centers.tolist(),
+            self._conf[slots].tolist(),
+            self._timestamp[slots].tolist(),
+            self._missing[slots].tolist()
+        ):
+            obj = {
+                "id": track_id,
                 "bbox": bbox,
-                "confidence": det["confidence"],
-                "center": self._center(bbox),
-                "timestamp": current_time,
-                "missing": 0
+                "confidence": confidence,
+                "center": tuple(center),
+                "timestamp": timestamp
             }
 
-            self.next_id += 1
+            if include_missing:
+                obj["missing"] = missing
 
-        # Update tracker state
-        self.tracks = updated_tracks
+            tracked_objects.append(obj)
+
+        return tracked_objects, centers, ids
+
+
+class DeepSortTrackerAdapter:
+    """
+    DeepSORT (deep-sort-realtime) behind the PeopleTracker output format.
+    Detections are converted in bulk through a preallocated buffer.
+    """
+
+    PERSON_CLASS_ID = 0
+    CACHE_IOU_THRESHOLD = 0.3  # Min overlap to reuse a track's feature
+    DUMMY_EMBED_DIM = 128      # Feature size when no embedder is available
+
+    def __init__(self, max_age=30, max_dets=100, embed_every=1, **deepsort_kwargs):
+        """
+        max_age → Frames a lost track is kept (DeepSORT)
+        max_dets → Max detections converted per frame
+        embed_every → Run the ReID embedder every K frames; in between,
+                      detections reuse the latest feature of the track they
+                      overlap most (1 = every frame). A detection overlapping
+                      no track still triggers the embedder.
+        deepsort_kwargs → Passed through to DeepSort(); embedder=None gives
+                          an IoU/motion-only tracker with constant features
+        """
+        # Optional dependency: only needed when this tracker is used
+        from deep_sort_realtime.deepsort_tracker import DeepSort
+
+        self.tracker = DeepSort(max_age=max_age, **deepsort_kwargs)
+        self.max_dets = max_dets
+        self.embed_every = max(1, int(embed_every))
+        self._frame_idx = 0
+
+        # xyxy → ltwh conversion buffer
+        self._ltwh = np.empty((max_dets, 4), dtype=np.float32)
+
+        # Centers/ids of the last step() output, as arrays
+        self.last_centers = np.empty((0, 2), dtype=np.int32)
+        self.last_ids = np.empty(0, dtype=np.int64)
+
+    def update(self, detections, frame=None):
+        """
+        Same input/output as PeopleTracker.update (frame feeds the embedder;
+        without it, cached features are used)
+        """
+        return self.step(
+            frame,
+            [det["bbox"] for det in detections],
+            [det["confidence"] for det in detections]
+        )
+
+    def step(self, frame, detections_xyxy, confs):
+        """
+        Input → frame, (N,4) xyxy boxes, (N,) confidences
+        Output → tracked_objects list
+        """
+        n = min(len(detections_xyxy), self.max_dets)
+
+        ltwh = self._ltwh[:n]
+        scores = np.asarray(confs, dtype=np.float32)[:n]
+        if n:
+            ltwh[:] = np.asarray(detections_xyxy, dtype=np.float32)[:n]
+            ltwh[:, 2:] -= ltwh[:, :2]
+
+            # DeepSort drops empty boxes itself; drop them here so embeds stay aligned
+            keep = (ltwh[:, 2] > 0) & (ltwh[:, 3] > 0)
+            ltwh, scores = ltwh[keep], scores[keep]
+
+        tracker_inputs = list(zip(
+            ltwh.tolist(),
+            scores.tolist(),
+            [self.PERSON_CLASS_ID] * len(ltwh)
+        ))
+
+        has_embedder = self.tracker.embedder is not None
+
+        # ReID only every K frames
+        use_embedder = (
+            has_embedder and frame is not None and self._frame_idx % self.embed_every == 0
+        )
+        self._frame_idx += 1
+
+        if not use_embedder:
+            embeds, hit = self._cached_embeds(ltwh)
+
+            # A placeholder feature would enter a new track's gallery, so
+            # unmatched detections need a real one
+            if has_embedder and not hit.all():
+                if frame is not None:
+                    use_embedder = True
+                else:
+                    # Nothing to embed from: hold them back until a frame comes
+                    tracker_inputs = [inp for inp, keep in zip(tracker_inputs, hit) if keep]
+                    embeds = embeds[hit]
+
+        if use_embedder:
+            tracks = self.tracker.update_tracks(tracker_inputs, frame=frame)
+        else:
+            tracks = self.tracker.update_tracks(tracker_inputs, embeds=embeds)
+        confirmed = [track for track in tracks if track.is_confirmed()]
+
+        # One timestamp for the whole frame
+        now = time.time()
+
+        # Read every box once into a stacked (N,4) matrix
+        bboxes = np.array(
+            [track.to_ltrb() for track in confirmed], dtype=np.float64
+        ).reshape(-1, 4).astype(np.int32)
+        centers = (bboxes[:, :2] + bboxes[:, 2:]) // 2
+        ids = np.array([int(track.track_id) for track in confirmed], dtype=np.int64)
 
-        # ---------------------------
-        # Prepare Output Format
-        # ---------------------------
         tracked_objects = []
 
-        for track in self.tracks.values():
+        for track, track_id, bbox, center in zip(
+            confirmed, ids.tolist(), bboxes.tolist(), centers.tolist()
+        ):
+            confidence = track.get_det_conf()
 
             tracked_objects.append({
-                "id": track["id"],
-                "bbox": track["bbox"],
-                "confidence": track["confidence"],
-                "center": track["center"],
-                "timestamp": track["timestamp"]
+                "id": track_id,
+                "bbox": bbox,
+                "confidence": 0.0 if confidence is None else float(confidence),
+                "center": tuple(center),
+                "timestamp": now
             })
 
+        self.last_centers, self.last_ids = centers, ids
+
         return tracked_objects
+
+    def get_centers_ids(self):
+        """Same as PeopleTracker.get_centers_ids"""
+        return self.last_centers, self.last_ids
+
+    def _cached_embeds(self, ltwh):
+        """
+        Features for frames the embedder skips: the latest feature of the
+        best-overlapping existing track, else a constant unit vector
+        (only kept as-is in embedder=None mode)
+        Returns: (N,D) float32 embeds, (N,) bool mask of detections with a track
+        """
+        n = len(ltwh)
+        tracks = [track for track in self.tracker.tracker.tracks if track.features]
+
+        dim = len(tracks[0].get_feature()) if tracks else self.DUMMY_EMBED_DIM
+        embeds = np.full((n, dim), 1.0 / np.sqrt(dim), dtype=np.float32)
+        hit = np.zeros(n, dtype=np.bool_)
+
+        if n and tracks:
+            det_boxes = ltwh.copy()
+            det_boxes[:, 2:] += det_boxes[:, :2]
+
+            # Tracks are not predicted yet: boxes are still last frame's
+            track_boxes = np.array([track.to_ltrb() for track in tracks], dtype=np.float32)
+
+            iou = iou_matrix(track_boxes, det_boxes)
+            best = iou.argmax(axis=0)
+            hit = iou[best, np.arange(n)] > self.CACHE_IOU_THRESHOLD
+
+            if hit.any():
+                features = np.array([track.get_feature() for track in tracks], dtype=np.float32)
+                embeds[hit] = features[best[hit]]
+
+        return embeds, hit
@@ -1,26 +1,108 @@
+import queue
+import threading
 import cv2
 
+# Network camera URLs are live streams, not files
+LIVE_URL_SCHEMES = ("rtsp://", "rtsps://", "rtmp://", "http://", "https://", "udp://", "tcp://")
+
 class VideoStream:
-    def __init__(self, source=0):
+    def __init__(self, source=0, width=None, height=None, live=None):
         """
         Initialize the video source. 
         0 is usually the default webcam. 
         Alternatively, pass a string path to a video file.
+
+        width/height request a native capture resolution from the driver
+        (ideally the detector input size) so no software resize is needed.
+
+        Frames are read on a background thread. For a live source, get_frame()
+        returns the most recent one; a file is queued so no frame is dropped.
+
+        live → Force live/file handling; by default camera indices and
+               network URLs are live, as is anything without a frame count
         """
         self.cap = cv2.VideoCapture(source)
         if not self.cap.isOpened():
             print(f"Error: Could not open video source {source}")
 
+        if live is None:
+            live = (
+                isinstance(source, int)
+                or str(source).lower().startswith(LIVE_URL_SCHEMES)
+                or self.cap.get(cv2.CAP_PROP_FRAME_COUNT) <= 0
+            )
+        self.live = live
+
+        if self.live:
+            # Keep the driver from queueing stale frames
+            self.cap.set(cv2.CAP_PROP_BUFFERSIZE, 1)
+
+        if width is not None:
+            self.cap.set(cv2.CAP_PROP_FRAME_WIDTH, width)
+        if height is not None:
+            self.cap.set(cv2.CAP_PROP_FRAME_HEIGHT, height)
+
+        self._lock = threading.Lock()
+        self._latest = (False, None)
+        self._new_frame = threading.Event()
+        self._stopped = threading.Event()
+
+        # File sources: small blocking queue, the reader waits for the consumer
+        self._frames = queue.Queue(maxsize=2)
+
+        self._thread = threading.Thread(target=self._reader, daemon=True)
+        self._thread.start()
+
+    def _reader(self):
+        """Producer loop: newest frame for cameras, every frame for files."""
+        while not self._stopped.is_set():
+            # cap.read() allocates a fresh array, so the consumer owns it
+            ret, frame = self.cap.read()
+
+            if self.live:
+                with self._lock:
+                    self._latest = (ret, frame)
+                    self._new_frame.set()
+            else:
+                self._put_frame((ret, frame))
+
+            if not ret:
+                self._stopped.set()
+
+    def _put_frame(self, item):
+        """Blocking put that gives up once the stream is released"""
+        while not self._stopped.is_set():
+            try:
+                self._frames.put(item, timeout=0.1)
+                return
+            except queue.Full:
+                continue
+
     def get_frame(self):
         """
-        Reads a single frame from the source.
+        Returns the next frame, waiting until one arrives or the stream ends.
         Returns: ret (bool), frame (numpy array)
         """
-        ret, frame = self.cap.read()
-        return ret, frame
+        if not self.live:
+            while True:
+                try:
+                    return self._frames.get(timeout=0.1)
+                except queue.Empty:
+                    if self._stopped.is_set() and self._frames.empty():
+                        return False, None
+
+        while not self._new_frame.wait(0.1):
+            if self._stopped.is_set():
+                return False, None
+
+        with self._lock:
+            self._new_frame.clear()
+            return self._latest
 
     def release(self):
-        """Release the camera resource."""
+        """Stop the reader thread and release the camera resource."""
+        self._stopped.set()
+        self._thread.join(timeout=1)
         self.cap.release()
 
 if __name__ == "__main__":
@@ -0,0 +1,16 @@
+import os
+import sys
+import types
+
+APP_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+BACKEND_DIR = os.path.join(APP_DIR, "modules", "backend")
+
+# Backend modules import each other as top-level modules; main.py sits in APP_DIR
+sys.path.insert(0, BACKEND_DIR)
+sys.path.insert(0, APP_DIR)
+
+# main.py imports modules.<name>; the files live in modules/backend
+if "modules" not in sys.modules:
+    modules_pkg = types.ModuleType("modules")
+    modules_pkg.__path__ = [BACKEND_DIR]
+    sys.modules["modules"] = modules_pkg
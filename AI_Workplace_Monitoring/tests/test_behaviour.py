@@ -0,0 +1,164 @@
+import math
+
+import numpy as np
+import pytest
+
+import behaviour
+from behaviour import (
+    ALERT_COOLDOWN, CROWD_COUNT_THRESHOLD, CROWD_DISTANCE_THRESHOLD,
+    IDLE_TIME_THRESHOLD, MOVEMENT_THRESHOLD, OBSERVATION_TIME,
+    SUSPICIOUS_TIME_THRESHOLD, BehaviourState, analyse_behaviour
+)
+
+
+# -----------------------------
+# Reference: original dict-based implementation
+# (cooldowns on frame timestamps, as changed in chunk0-11)
+# -----------------------------
+def reference_analyse_behaviour(tracked_people, person_history):
+    alerts = []
+    centers = []
+
+    active_ids = {p["id"] for p in tracked_people}
+
+    for pid in list(person_history.keys()):
+        if pid not in active_ids:
+            del person_history[pid]
+
+    for person in tracked_people:
+        pid = person["id"]
+        center = person["center"]
+        timestamp = person["timestamp"]
+
+        centers.append((pid, center))
+
+        if pid not in person_history:
+            person_history[pid] = {
+                "last_position": center,
+                "last_move_time": timestamp,
+                "first_seen": timestamp,
+                "last_alert_time": {}
+            }
+            continue
+
+        history = person_history[pid]
+
+        prev_pos = history["last_position"]
+        if math.dist(center, prev_pos) > MOVEMENT_THRESHOLD:
+            history["last_move_time"] = timestamp
+            history["last_position"] = center
+
+        idle_time = timestamp - history["last_move_time"]
+        total_time = timestamp - history["first_seen"]
+
+        if total_time < OBSERVATION_TIME:
+            continue
+
+        if idle_time >= IDLE_TIME_THRESHOLD:
+            last_alert = history["last_alert_time"].get("IDLE", 0)
+
+            if timestamp - last_alert > ALERT_COOLDOWN:
+                alerts.append({"type": "IDLE", "person_id": pid, "duration": round(idle_time, 2)})
+                history["last_alert_time"]["IDLE"] = timestamp
+
+        if total_time >= SUSPICIOUS_TIME_THRESHOLD:
+            last_alert = history["last_alert_time"].get("SUSPICIOUS_STANDING", 0)
+
+            if timestamp - last_alert > ALERT_COOLDOWN:
+                alerts.append({
+                    "type": "SUSPICIOUS_STANDING", "person_id": pid,
+                    "duration": round(total_time, 2)
+                })
+                history["last_alert_time"]["SUSPICIOUS_STANDING"] = timestamp
+
+    crowd_people = set()
+
+    for i in range(len(centers)):
+        pid1, c1 = centers[i]
+        for j in range(i + 1, len(centers)):
+            pid2, c2 = centers[j]
+            if math.dist(c1, c2) < CROWD_DISTANCE_THRESHOLD:
+                crowd_people.add(pid1)
+                crowd_people.add(pid2)
+
+    if len(crowd_people) >= CROWD_COUNT_THRESHOLD:
+        alerts.append({"type": "CROWD_DETECTED", "count": len(crowd_people)})
+
+    return alerts
+
+
+def simulate_people(seed, frames=400, max_people=12):
+    """Frames of tracked people: walkers, idlers, a cluster, arrivals and departures"""
+    rng = np.random.default_rng(seed)
+    positions = {}
+    next_id = 1
+
+    for frame_idx in range(frames):
+        timestamp = 1000.0 + frame_idx * 0.9
+
+        # Departures and arrivals
+        for pid in list(positions):
+            if rng.random() < 0.01:
+                del positions[pid]
+        while len(positions) < max_people and rng.random() < 0.3:
+            positions[next_id] = rng.integers(0, 600, 2)
+            next_id += 1
+
+        people = []
+        for pid, pos in positions.items():
+            if pid % 3 == 0:
+                # Every third person stands still, jittering around one spot
+                center = pos + rng.integers(-2, 3, 2)
+            else:
+                pos += rng.integers(-8, 9, 2)
+                center = pos
+
+            people.append({
+                "id": pid,
+                "center": (int(center[0]), int(center[1])),
+                "timestamp": timestamp
+            })
+
+        yield people
+
+
+@pytest.mark.parametrize("seed", range(5))
+def test_matches_reference(seed):
+    state = BehaviourState(capacity=4)  # small capacity also exercises _grow()
+    history = {}
+
+    for people in simulate_people(seed):
+        assert analyse_behaviour(people, state) == reference_analyse_behaviour(people, history)
+
+
+@pytest.mark.parametrize("seed", range(3))
+def test_numpy_path_matches_reference(monkeypatch, seed):
+    monkeypatch.setattr(behaviour, "_behaviour_kernel", behaviour._behaviour_kernel_numpy)
+
+    state = BehaviourState()
+    history = {}
+
+    for people in simulate_people(seed):
+        assert analyse_behaviour(people, state) == reference_analyse_behaviour(people, history)
+
+
+def test_kernels_agree():
+    rng = np.random.default_rng(0)
+
+    for _ in range(200):
+        n = int(rng.integers(0, 30))
+        centers = rng.integers(0, 300, (n, 2)).astype(np.float32)
+        last_pos = (centers + rng.integers(-8, 8, (n, 2))).astype(np.float32)
+        ts = 1000.0 + rng.random(n)
+        args = (
+            centers, last_pos, ts - rng.uniform(0, 300, n), ts - rng.uniform(0, 400, n),
+            ts, rng.random(n) < 0.2, ts - rng.uniform(0, 20, n), ts - rng.uniform(0, 20, n)
+        )
+
+        for loops, vectorized in zip(behaviour._behaviour_kernel_loops(*args),
+                                     behaviour._behaviour_kernel_numpy(*args)):
+            np.testing.assert_array_equal(loops, vectorized)
+
+
+def test_empty_frame():
+    assert analyse_behaviour([], BehaviourState()) == []
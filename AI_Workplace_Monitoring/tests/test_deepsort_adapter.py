@@ -0,0 +1,100 @@
+import numpy as np
+import pytest
+
+pytest.importorskip("deep_sort_realtime")
+
+from tracking import DeepSortTrackerAdapter
+
+
+class CountingEmbedder:
+    """Stands in for the ReID network; records how many crops it embedded"""
+
+    def __init__(self):
+        self.calls = []
+
+    def predict(self, crops):
+        self.calls.append(len(crops))
+        return [np.full(64, len(self.calls), dtype=np.float32) for _ in crops]
+
+
+def make_adapter(**kwargs):
+    return DeepSortTrackerAdapter(max_age=5, embedder=None, n_init=1, **kwargs)
+
+
+def walking_boxes(frame_idx):
+    return [[10 + frame_idx, 10, 60 + frame_idx, 110], [200, 50, 260, 170]]
+
+
+def test_iou_only_mode_keeps_ids():
+    adapter = make_adapter()
+
+    for frame_idx in range(6):
+        objects = adapter.step(None, walking_boxes(frame_idx), [0.9, 0.8])
+
+    assert [obj["id"] for obj in objects] == [1, 2]
+
+    # Boxes are the Kalman estimate, so allow a pixel of smoothing
+    np.testing.assert_allclose(objects[0]["bbox"], walking_boxes(5)[0], atol=1)
+
+    centers, ids = adapter.get_centers_ids()
+    assert ids.tolist() == [1, 2]
+    assert [tuple(c) for c in centers.tolist()] == [obj["center"] for obj in objects]
+    assert objects[0]["center"] == tuple((np.array(objects[0]["bbox"][:2])
+                                          + objects[0]["bbox"][2:]) // 2)
+
+
+def test_update_accepts_detector_output():
+    adapter = make_adapter()
+    detections = [{"bbox": box, "confidence": 0.9} for box in walking_boxes(0)]
+
+    adapter.update(detections)
+    objects = adapter.update(detections)
+
+    assert {"id", "bbox", "confidence", "center", "timestamp"} <= set(objects[0])
+
+
+def test_empty_boxes_are_dropped():
+    adapter = make_adapter()
+
+    for _ in range(2):
+        objects = adapter.step(None, walking_boxes(0) + [[300, 300, 300, 310]], [0.9] * 3)
+
+    assert len(objects) == 2
+
+
+def test_embedder_runs_every_k_frames():
+    adapter = make_adapter(embed_every=3)
+    embedder = adapter.tracker.embedder = CountingEmbedder()
+    frame = np.zeros((480, 640, 3), dtype=np.uint8)
+
+    for frame_idx in range(7):
+        adapter.step(frame, walking_boxes(frame_idx), [0.9, 0.8])
+
+    # Frames 0, 3 and 6 only
+    assert embedder.calls == [2, 2, 2]
+
+
+def test_new_detection_triggers_embedder():
+    adapter = make_adapter(embed_every=3)
+    embedder = adapter.tracker.embedder = CountingEmbedder()
+    frame = np.zeros((480, 640, 3), dtype=np.uint8)
+
+    for frame_idx in range(3):
+        boxes = walking_boxes(frame_idx)
+        if frame_idx == 1:
+            boxes.append([400, 100, 450, 200])
+        adapter.step(frame, boxes, [0.9] * len(boxes))
+
+    # Frame 1 is off-cycle but has a detection no track overlaps
+    assert embedder.calls == [2, 3]
+
+
+def test_unmatched_detection_is_held_without_frame():
+    adapter = make_adapter(embed_every=3)
+    adapter.tracker.embedder = CountingEmbedder()
+    frame = np.zeros((480, 640, 3), dtype=np.uint8)
+
+    adapter.step(frame, walking_boxes(0), [0.9, 0.8])
+    adapter.step(None, walking_boxes(1) + [[400, 100, 450, 200]], [0.9] * 3)
+
+    assert len(adapter.tracker.tracker.tracks) == 2
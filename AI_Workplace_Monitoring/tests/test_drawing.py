@@ -0,0 +1,85 @@
+import cv2
+import numpy as np
+import pytest
+
+from restricted_area import RestrictedAreaChecker
+
+
+def random_frame(shape=(480, 640, 3), seed=0):
+    return np.random.default_rng(seed).integers(0, 256, shape, dtype=np.uint8)
+
+
+def max_pixel_diff(a, b):
+    return int(np.abs(a.astype(np.int16) - b.astype(np.int16)).max())
+
+
+# -----------------------------
+# Reference: original draw_areas (draw on the frame, then blend a filled copy)
+# -----------------------------
+def reference_draw_areas(frame, restricted_areas):
+    overlay = frame.copy()
+
+    for area in restricted_areas:
+        points = area["points"]
+        cv2.fillPoly(overlay, [points], (0, 0, 255))
+        cv2.polylines(frame, [points], True, (0, 0, 255), 2)
+        cv2.putText(frame, area["name"], tuple(points.mean(axis=0).astype(int)),
+                    cv2.FONT_HERSHEY_SIMPLEX, 0.7, (0, 0, 255), 2)
+
+    return cv2.addWeighted(overlay, 0.2, frame, 0.8, 0)
+
+
+def test_draw_areas_matches_reference():
+    frame = random_frame()
+    checker = RestrictedAreaChecker(frame.shape)
+    checker._add_area("Triangle", [[300, 100], [420, 300], [250, 350]], 0)
+
+    expected = reference_draw_areas(frame.copy(), checker.restricted_areas)
+
+    # Anti-aliased label and border edges must blend, not paste as opaque dark
+    # pixels; the only difference allowed is the reference's double rounding
+    for _ in range(2):  # first call builds the cached overlay, second reuses it
+        assert max_pixel_diff(checker.draw_areas(frame.copy()), expected) <= 1
+
+
+def test_draw_areas_rebuilds_for_new_frame_size():
+    checker = RestrictedAreaChecker((480, 640, 3))
+    checker.draw_areas(random_frame())
+
+    frame = random_frame((240, 320, 3), seed=1)
+    expected = reference_draw_areas(frame.copy(), checker.restricted_areas)
+
+    assert max_pixel_diff(checker.draw_areas(frame.copy()), expected) <= 1
+
+
+# -----------------------------
+# Reference: original per-track rectangle + putText loop
+# -----------------------------
+def reference_draw_tracks(frame, tracked_objects):
+    for obj in tracked_objects:
+        x1, y1, x2, y2 = obj["bbox"]
+        cv2.rectangle(frame, (x1, y1), (x2, y2), (0, 255, 0), 2)
+        cv2.putText(frame, f"ID: {obj['id']}", (x1, y1 - 10),
+                    cv2.FONT_HERSHEY_SIMPLEX, 0.5, (0, 255, 0), 2)
+    return frame
+
+
+def test_track_drawer_matches_reference():
+    pytest.importorskip("ultralytics")  # main.py imports the detector
+    from main import TrackDrawer
+
+    rng = np.random.default_rng(0)
+    corners = rng.integers(0, 560, (12, 2))
+    boxes = [[int(x), int(y), int(x) + 50, int(y) + 90] for x, y in corners]
+    # Labels clipped at the top and left edges
+    boxes += [[0, 5, 40, 60], [600, 0, 639, 50]]
+
+    tracked_objects = [{"id": i + 1, "bbox": box} for i, box in enumerate(boxes)]
+
+    drawer = TrackDrawer()
+    frame = random_frame()
+    expected = reference_draw_tracks(frame.copy(), tracked_objects)
+
+    # Second pass draws from the label cache
+    for _ in range(2):
+        assert max_pixel_diff(drawer.draw(frame.copy(), tracked_objects), expected) == 0
@@ -0,0 +1,103 @@
+import cv2
+import numpy as np
+import pytest
+
+from restricted_area import RestrictedAreaChecker, _classify_shape, _winding_contains
+
+FRAME_SHAPE = (480, 640, 3)
+
+EXTRA_AREAS = [
+    ("Triangle", [[300, 100], [420, 300], [250, 350]], 0),
+    # Concave "L", so the winding test has a notch to get wrong
+    ("Corridor", [[100, 380], [300, 380], [300, 420], [160, 420], [160, 470], [100, 470]], 1),
+]
+
+
+# -----------------------------
+# Reference: original per-person pointPolygonTest loop
+# -----------------------------
+def reference_check(restricted_areas, tracked_people):
+    alerts = []
+
+    for area in restricted_areas:
+        people_in_area = [
+            person["id"] for person in tracked_people
+            if cv2.pointPolygonTest(
+                area["points"], (float(person["center"][0]), float(person["center"][1])), False
+            ) >= 0
+        ]
+
+        if len(people_in_area) > area["max_people"]:
+            alerts.append({
+                "type": "RESTRICTED_AREA_BREACH",
+                "person_id": people_in_area[0],
+                "details": f"{len(people_in_area)} people in {area['name']}"
+            })
+
+    return alerts
+
+
+def make_checker():
+    checker = RestrictedAreaChecker(FRAME_SHAPE)
+    for name, points, max_people in EXTRA_AREAS:
+        checker._add_area(name, points, max_people)
+    return checker
+
+
+def random_people(rng, checker, n):
+    """Random centers, with some placed exactly on polygon vertices and edges"""
+    centers = rng.integers(-5, 645, (n, 2))
+
+    for i in range(0, n, 4):
+        points = checker.restricted_areas[rng.integers(len(checker.restricted_areas))]["points"]
+        a, b = points[rng.integers(len(points))], points[rng.integers(len(points))]
+        centers[i] = a if i % 8 == 0 else (a + b) // 2
+
+    return [{"id": i + 1, "center": (int(x), int(y))} for i, (x, y) in enumerate(centers)]
+
+
+@pytest.mark.parametrize("seed", range(20))
+def test_matches_reference(seed):
+    rng = np.random.default_rng(seed)
+    checker = make_checker()
+    people = random_people(rng, checker, int(rng.integers(0, 25)))
+
+    expected = reference_check(checker.restricted_areas, people)
+    assert checker.check_restricted_area(people) == expected
+
+    # Same result through the array inputs PeopleTracker provides
+    centers = np.array([p["center"] for p in people], dtype=np.int32).reshape(-1, 2)
+    ids = np.array([p["id"] for p in people], dtype=np.int64)
+    assert checker.check_restricted_area(people, centers=centers, ids=ids) == expected
+
+
+def test_winding_matches_point_polygon_test():
+    rng = np.random.default_rng(0)
+    query = rng.integers(90, 430, (5000, 2)).astype(np.int32)
+
+    for _, points, _ in EXTRA_AREAS:
+        poly = np.array(points, dtype=np.int32)
+        expected = [cv2.pointPolygonTest(poly, (float(x), float(y)), False) >= 0 for x, y in query]
+
+        np.testing.assert_array_equal(_winding_contains(query, poly), expected)
+
+
+def test_point_in_polygon():
+    checker = make_checker()
+    triangle = np.array(EXTRA_AREAS[0][1], dtype=np.int32)
+
+    assert checker.point_in_polygon((320, 250), triangle)
+    assert checker.point_in_polygon((300, 100), triangle)  # vertex counts as inside
+    assert not checker.point_in_polygon((420, 100), triangle)
+
+
+def test_classify_shape():
+    assert _classify_shape(np.array([[0, 0], [10, 0], [10, 5], [0, 5]])) == "rect"
+    assert _classify_shape(np.array([[0, 0], [0, 5], [10, 5], [10, 0]])) == "rect"
+    assert _classify_shape(np.array([[0, 0], [10, 0], [10, 5], [0, 6]])) == "poly"
+    assert _classify_shape(np.array([[0, 0], [10, 0], [0, 10]])) == "poly"
+    assert _classify_shape(np.array(EXTRA_AREAS[1][1])) == "poly"
+
+    # Both default areas take the bounding-box fast path
+    default_areas = RestrictedAreaChecker(FRAME_SHAPE).restricted_areas
+    assert [area["shape"] for area in default_areas] == ["rect", "rect"]
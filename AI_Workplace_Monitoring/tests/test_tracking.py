@@ -0,0 +1,148 @@
+import numpy as np
+import pytest
+
+import tracking
+from tracking import IouWorkspace, PeopleTracker
+
+
+# -----------------------------
+# Reference: original greedy dict-based tracker (timestamps left out)
+# -----------------------------
+def reference_iou(box_a, box_b):
+    x_a = max(box_a[0], box_b[0])
+    y_a = max(box_a[1], box_b[1])
+    x_b = min(box_a[2], box_b[2])
+    y_b = min(box_a[3], box_b[3])
+
+    inter_area = max(0, x_b - x_a) * max(0, y_b - y_a)
+    union = ((box_a[2] - box_a[0]) * (box_a[3] - box_a[1])
+             + (box_b[2] - box_b[0]) * (box_b[3] - box_b[1]) - inter_area)
+
+    return 0 if union == 0 else inter_area / union
+
+
+class ReferenceTracker:
+    def __init__(self, iou_threshold=0.3, max_missing=30):
+        self.next_id = 1
+        self.tracks = {}
+        self.iou_threshold = iou_threshold
+        self.max_missing = max_missing
+
+    def update(self, detections):
+        updated_tracks = {}
+        matched_ids = set()
+
+        for track_id, track_data in self.tracks.items():
+            best_iou = 0
+            best_det_index = -1
+
+            for i, det in enumerate(detections):
+                if i in matched_ids:
+                    continue
+
+                iou_score = reference_iou(track_data["bbox"], det["bbox"])
+                if iou_score > best_iou:
+                    best_iou = iou_score
+                    best_det_index = i
+
+            if best_iou > self.iou_threshold and best_det_index != -1:
+                det = detections[best_det_index]
+                updated_tracks[track_id] = self._track(track_id, det)
+                matched_ids.add(best_det_index)
+            else:
+                track_data["missing"] += 1
+                if track_data["missing"] <= self.max_missing:
+                    updated_tracks[track_id] = track_data
+
+        for i, det in enumerate(detections):
+            if i in matched_ids:
+                continue
+
+            updated_tracks[self.next_id] = self._track(self.next_id, det)
+            self.next_id += 1
+
+        self.tracks = updated_tracks
+
+        return [
+            {key: track[key] for key in ("id", "bbox", "confidence", "center")}
+            for track in self.tracks.values()
+        ]
+
+    @staticmethod
+    def _track(track_id, det):
+        x1, y1, x2, y2 = det["bbox"]
+        return {
+            "id": track_id,
+            "bbox": det["bbox"],
+            "confidence": det["confidence"],
+            "center": (int((x1 + x2) / 2), int((y1 + y2) / 2)),
+            "missing": 0
+        }
+
+
+def simulate_detections(seed, frames=200, lanes=10):
+    """People walking in separate lanes, with dropouts, exits and re-entries"""
+    rng = np.random.default_rng(seed)
+    xs = rng.integers(0, 500, lanes)
+    present = rng.random(lanes) < 0.7
+
+    for _ in range(frames):
+        xs = np.clip(xs + rng.integers(-4, 5, lanes), 0, 560)
+        present ^= rng.random(lanes) < 0.02
+
+        detections = []
+        for lane in np.flatnonzero(present & (rng.random(lanes) > 0.1)):
+            x, y = int(xs[lane]), int(lane) * 60
+            detections.append({
+                "bbox": [x, y, x + 40, y + 50],
+                "confidence": round(float(rng.uniform(0.5, 1.0)), 3)
+            })
+
+        # Detector output order carries no meaning
+        order = rng.permutation(len(detections))
+        yield [detections[i] for i in order]
+
+
+def by_id(objects):
+    return sorted(
+        ({key: obj[key] for key in ("id", "bbox", "confidence", "center")} for obj in objects),
+        key=lambda obj: obj["id"]
+    )
+
+
+@pytest.mark.parametrize("seed", range(5))
+def test_matches_reference(seed):
+    tracker = PeopleTracker(iou_threshold=0.3, max_missing=5, capacity=2)  # also exercises _grow()
+    reference = ReferenceTracker(iou_threshold=0.3, max_missing=5)
+
+    for detections in simulate_detections(seed):
+        assert by_id(tracker.update(detections)) == by_id(reference.update(detections))
+
+
+def test_centers_ids_follow_output():
+    tracker = PeopleTracker()
+
+    for detections in simulate_detections(0, frames=20):
+        objects = tracker.update(detections)
+        centers, ids = tracker.get_centers_ids()
+
+        assert ids.tolist() == [obj["id"] for obj in objects]
+        assert [tuple(c) for c in centers.tolist()] == [obj["center"] for obj in objects]
+
+
+def test_iou_matrix_matches_reference():
+    rng = np.random.default_rng(0)
+    corners = rng.integers(0, 200, (2, 40, 2))
+    boxes = np.concatenate([corners.min(axis=0), corners.max(axis=0) + 1], axis=1)
+    track_boxes, det_boxes = boxes[:15].astype(np.float32), boxes[15:].astype(np.float32)
+
+    expected = np.array([[reference_iou(t, d) for d in det_boxes] for t in track_boxes])
+
+    np.testing.assert_allclose(tracking.iou_matrix(track_boxes, det_boxes), expected, atol=1e-6)
+    np.testing.assert_allclose(
+        tracking._iou_matrix_numpy(track_boxes, det_boxes), expected, atol=1e-6
+    )
+
+    # The workspace grows when asked for more boxes than it was sized for
+    workspace = IouWorkspace(2, 2)
+    np.testing.assert_allclose(workspace(track_boxes, det_boxes), expected, atol=1e-6)